@@ -0,0 +1,78 @@
+"""
+Checks the cost of `import confhub` against a stored budget.
+
+Runs `python -X importtime -c "import confhub"` in fresh interpreters, takes the best cumulative
+time of the `confhub` package and fails (exit code 1) if it is over budget or if one of the heavy
+dependencies that must only be loaded on first use was imported.
+
+Usage:
+    python -m benchmarks.import_time [--repeat 5] [--budget-ms 30]
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+# Stored budget: cumulative `-X importtime` of the `confhub` package, in milliseconds
+IMPORT_BUDGET_MS: float = 30.0
+
+# Must not be imported by `import confhub`
+LAZY_MODULES = (
+    "yaml",
+    "structlog",
+    "yarl",
+    "logging.config",
+    "inspect",
+    "asyncio",
+    "concurrent.futures",
+    "confhub.reader",
+    "confhub.core.parsing",
+)
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+
+PROBE = "import sys, json, confhub; print(json.dumps(sorted(sys.modules)))"
+
+
+def measure() -> tuple[float, list[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, check=True,
+    )
+    cumulative_us = next(
+        int(match.group(1))
+        for match in map(IMPORTTIME_LINE.match, result.stderr.splitlines())
+        if match and not match.group(2) and match.group(3) == "confhub"
+    )
+    return cumulative_us / 1000, json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    timings, modules = [], []
+    for _ in range(args.repeat):
+        timing, modules = measure()
+        timings.append(timing)
+
+    best = min(timings)
+    eager = [module for module in LAZY_MODULES if module in modules]
+    print(f"import confhub: {best:.1f} ms (budget {args.budget_ms:.1f} ms)")
+
+    failed = False
+    if best > args.budget_ms:
+        print("FAIL: import time is over budget")
+        failed = True
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares the per-element and bulk parsing of `is_list` values
+(`confhub.core.parsing.parsing_value` item by item against `parsing_list`).
+
+Usage:
+    python -m benchmarks.list_parsing [--size 50000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from confhub.core.parsing import parsing_value, parsing_list
+
+
+def generate_lists(size: int) -> dict:
+    return {
+        "int": [f"int; {8000 + i}" for i in range(size)],
+        "float": [f"float; {i / 7:.6f}" for i in range(size)],
+        "str": [f"str; 10.0.{i // 256 % 256}.{i % 256}" for i in range(size)],
+        "int+dev": [f"int; {i}; {i + 1}" for i in range(size)],
+    }
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def container_size(value) -> int:
+    if isinstance(value, list):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, values in generate_lists(args.size).items():
+        per_element = best_of(args.repeat, lambda: [parsing_value(value, False) for value in values])
+        bulk = best_of(args.repeat, lambda: parsing_list(values, False))
+        packed = best_of(args.repeat, lambda: parsing_list(values, False, packed=True))
+
+        list_size = container_size([parsing_value(value, False) for value in values])
+        packed_size = container_size(parsing_list(values, False, packed=True))
+
+        print(
+            f"{name:>8}: per-element {per_element:.3f}s, bulk {bulk:.3f}s (x{per_element / bulk:.1f}), "
+            f"packed {packed:.3f}s (x{per_element / packed:.1f}); "
+            f"memory {list_size / 1024:.0f} KiB -> {packed_size / 1024:.0f} KiB"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares logging throughput of the `SetupLogger` output modes.
+
+Every mode runs in a fresh interpreter (structlog caches configured loggers) with the stream handlers
+writing to a temporary file:
+
+    console   ConsoleRenderer, rendered and written in the calling thread
+    json      JSONRenderer, rendered and written in the calling thread
+    queued    JSONRenderer through the `production` profile: the caller only enqueues records,
+              a `QueueListener` thread renders and writes them
+
+Each mode is measured with and without callsite capture (`LoggerReg(callsite=...)`). `caller` is the
+rate at which the logging calls return, `drained` includes the time until every record is written.
+
+Usage:
+    python -m benchmarks.logging_throughput [--events 20000] [--repeat 3] [--mode json ...] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ("console", "json", "queued")
+
+
+def child(mode: str, callsite: bool, events: int) -> dict:
+    import structlog
+
+    from confhub.setup_logger import DEFAULT_PROFILE, PRODUCTION_PROFILE, LoggerReg, SetupLogger, stop_listeners
+
+    SetupLogger(
+        name_registration=[LoggerReg(name="bench", level=LoggerReg.Level.INFO, callsite=callsite)],
+        developer_mode=mode == "console",
+        profile=PRODUCTION_PROFILE if mode == "queued" else DEFAULT_PROFILE,
+    )
+    logger = structlog.get_logger("bench")
+
+    start = time.perf_counter()
+    for number in range(events):
+        logger.info("Request handled", number=number, path="/api/items", status=200)
+    returned = time.perf_counter() - start
+    stop_listeners()
+    drained = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "callsite": callsite,
+        "caller_per_s": round(events / returned),
+        "drained_per_s": round(events / drained),
+    }
+
+
+def run(mode: str, callsite: bool, events: int) -> dict:
+    env = {key: value for key, value in os.environ.items() if key != "DEV"}
+    with tempfile.TemporaryFile() as output:
+        # A regular file is not a tty, so `SetupLogger.renderer` follows `developer_mode`
+        result = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.logging_throughput", "--child", mode,
+                "--events", str(events), *(["--no-callsite"] if not callsite else []),
+            ],
+            stdout=subprocess.PIPE, stderr=output, text=True, check=True, env=env,
+        )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", action="append", choices=MODES)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--no-callsite", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, not args.no_callsite, args.events)))
+        return
+
+    results = []
+    for mode in args.mode or MODES:
+        for callsite in (True, False):
+            runs = [run(mode, callsite, args.events) for _ in range(args.repeat)]
+            results.append({
+                "mode": mode,
+                "callsite": callsite,
+                "caller_per_s": max(item["caller_per_s"] for item in runs),
+                "drained_per_s": max(item["drained_per_s"] for item in runs),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':<10}{'callsite':>10}{'caller/s':>14}{'drained/s':>14}")
+    for item in results:
+        print(f"{item['mode']:<10}{str(item['callsite']):>10}{item['caller_per_s']:>14,}{item['drained_per_s']:>14,}")
+
+
+if __name__ == "__main__":
+    main()
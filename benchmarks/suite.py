@@ -0,0 +1,178 @@
+"""
+Benchmark suite for loading and generating configurations on synthetic projects.
+
+Every combination of the given parameters is generated into a temporary project (see `benchmarks.synthetic`)
+and the phases are timed separately:
+    merge         YamlFileMerger over the configuration files
+    from_dict     BlockCore.from_dict of every top-level block
+    load          Confhub(...) (.service.yml, merge, conversion, models class; models module already imported)
+    builder       ConfigurationBuilder(*models)
+    create_files  ConfigurationBuilder.create_files into an empty folder
+
+Results are written as JSON; pass `--compare` with an earlier result file to print the ratios.
+
+Usage:
+    python -m benchmarks.suite [--blocks 10,100] [--fields 10] [--depth 0,2] [--list-size 0,1000]
+                               [--files 1,8] [--dev-values 0,1] [--repeat 5] [--output result.json]
+                               [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Iterator
+
+from benchmarks.synthetic import Shape, write_project
+from confhub.__meta__ import __version__
+
+PHASES = ("merge", "from_dict", "load", "builder", "create_files")
+
+
+def parse_ints(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def timings(repeat: int, fn: Callable[[], object], setup: Callable[[], object] = lambda: None) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"best": min(samples), "mean": statistics.fmean(samples), "samples": samples}
+
+
+@contextlib.contextmanager
+def project(shape: Shape, index: int) -> Iterator[Path]:
+    from confhub.core.parsing import YamlBackend
+
+    with tempfile.TemporaryDirectory(prefix="confhub-bench-") as tmp:
+        root = Path(tmp)
+        write_project(root, shape, f"confhub_bench_{index}", YamlBackend())
+        cwd = os.getcwd()
+        os.chdir(root)
+        sys.path.insert(0, str(root))
+        try:
+            yield root
+        finally:
+            sys.path.remove(str(root))
+            os.chdir(cwd)
+
+
+def run_shape(shape: Shape, index: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    from confhub import Confhub
+    from confhub.builder import ConfigurationBuilder
+    from confhub.core.parsing import YamlFileMerger, YamlBackend, config_files, get_service_data
+    from confhub.setup_logger import LoggerReg
+    from confhub.utils.__models import get_models_from_path
+
+    with project(shape, index) as root:
+        def load() -> Confhub:
+            config = Confhub(logger_regs=[LoggerReg(name="", level=LoggerReg.Level.WARNING)])
+            logging.getLogger("confhub").setLevel(logging.WARNING)
+            return config
+
+        load()
+        service_data = get_service_data()
+        models = [model for model in get_models_from_path(data=service_data) if model.__block__]
+        top_level = [model for model in models if model.__block__.count("_level_") == 0]
+        files = config_files(Path(service_data['configs_path']))
+        backend = YamlBackend()
+        merged = YamlFileMerger(*files, backend=backend).data
+
+        output = root / "generated"
+
+        def clean_output() -> None:
+            if output.exists():
+                for file in output.iterdir():
+                    file.unlink()
+            output.mkdir(exist_ok=True)
+
+        builder = ConfigurationBuilder(*models)
+        return {
+            "merge": timings(repeat, lambda: YamlFileMerger(*files, backend=backend)),
+            "from_dict": timings(repeat, lambda: [
+                model.from_dict(merged.get(model.__block__), development_mode=shape.dev_values) for model in top_level
+            ]),
+            "load": timings(repeat, load),
+            "builder": timings(repeat, lambda: ConfigurationBuilder(*models)),
+            "create_files": timings(repeat, lambda: builder.create_files(output, backend=backend), setup=clean_output),
+        }
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {result["label"]: result for result in json.load(file)["results"]}
+
+    for result in current["results"]:
+        before = baseline.get(result["label"])
+        if before is None:
+            continue
+        ratios = ", ".join(
+            f"{phase} x{result['timings'][phase]['best'] / before['timings'][phase]['best']:.2f}"
+            for phase in PHASES
+            if phase in before["timings"] and before["timings"][phase]["best"]
+        )
+        print(f"{result['label']}: {ratios}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=parse_ints, default=[10, 100])
+    parser.add_argument("--fields", type=parse_ints, default=[10])
+    parser.add_argument("--depth", type=parse_ints, default=[0, 2])
+    parser.add_argument("--list-size", type=parse_ints, default=[0, 1000])
+    parser.add_argument("--files", type=parse_ints, default=[1, 8])
+    parser.add_argument("--dev-values", type=parse_ints, default=[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="File to write the JSON result to (default: stdout)")
+    parser.add_argument("--compare", help="Earlier JSON result to compare with")
+    args = parser.parse_args()
+
+    shapes = [
+        Shape(blocks=blocks, fields=fields, depth=depth, list_size=list_size, files=files, dev_values=bool(dev_values))
+        for blocks, fields, depth, list_size, files, dev_values in itertools.product(
+            args.blocks, args.fields, args.depth, args.list_size, args.files, args.dev_values
+        )
+    ]
+
+    results = []
+    for index, shape in enumerate(shapes):
+        print(f"[{index + 1}/{len(shapes)}] {shape.label}", file=sys.stderr)
+        results.append({
+            "label": shape.label,
+            "shape": shape.__dict__,
+            "timings": run_shape(shape, index, args.repeat),
+        })
+
+    report = {
+        "confhub": __version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
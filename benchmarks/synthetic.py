@@ -0,0 +1,107 @@
+"""
+Generator of synthetic confhub projects for the benchmarks: a `.service.yml`, a models module and
+configuration files, shaped by `Shape`.
+"""
+import dataclasses
+import itertools
+from pathlib import Path
+from typing import Any, Dict, List
+
+from confhub.core.parsing import YamlBackend
+
+
+@dataclasses.dataclass(frozen=True)
+class Shape:
+    """
+    Attributes:
+    blocks (int): Number of top-level blocks.
+    fields (int): Scalar fields per block (and per nested block).
+    depth (int): Levels of nested blocks under every top-level block.
+    list_size (int): Items of the `is_list` field of every block, 0 for no list field.
+    files (int): Number of configuration files the blocks are spread over.
+    dev_values (bool): Whether values carry a developer-mode alternative.
+    """
+    blocks: int = 20
+    fields: int = 10
+    depth: int = 1
+    list_size: int = 100
+    files: int = 4
+    dev_values: bool = False
+
+    @property
+    def label(self) -> str:
+        return "-".join(f"{name}={value}" for name, value in dataclasses.asdict(self).items())
+
+
+FIELD_TYPES = ("str", "int", "float", "bool")
+SAMPLE_VALUES = {"str": "value_{}", "int": "{}", "float": "{}.5", "bool": "true"}
+
+
+def block_class(block: int, level: int) -> str:
+    return f"Block{block}Level{level}"
+
+
+def block_key(block: int, level: int) -> str:
+    return f"block_{block}" if level == 0 else f"block_{block}_level_{level}"
+
+
+def generate_models(shape: Shape) -> str:
+    lines = ["from confhub import BlockCore, field", ""]
+    for block in range(shape.blocks):
+        for level in reversed(range(shape.depth + 1)):
+            lines += ["", f"class {block_class(block, level)}(BlockCore):", f"    __block__ = '{block_key(block, level)}'"]
+            for index in range(shape.fields):
+                type_name = FIELD_TYPES[index % len(FIELD_TYPES)]
+                lines.append(f"    field_{index} = field({type_name})")
+            if shape.list_size:
+                lines.append("    items = field(int, is_list=True)")
+            if level < shape.depth:
+                lines.append(f"    child = {block_class(block, level + 1)}()")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def generate_value(type_name: str, seed: int, dev_values: bool) -> str:
+    value = SAMPLE_VALUES[type_name].format(seed)
+    return f"{type_name}; {value}; {value}" if dev_values else f"{type_name}; {value}"
+
+
+def generate_block(shape: Shape, block: int, level: int) -> Dict[str, Any]:
+    data: Dict[str, Any] = {
+        f"field_{index}": generate_value(FIELD_TYPES[index % len(FIELD_TYPES)], block + index, shape.dev_values)
+        for index in range(shape.fields)
+    }
+    if shape.list_size:
+        data["items"] = [generate_value("int", item, shape.dev_values) for item in range(shape.list_size)]
+    if level < shape.depth:
+        data[block_key(block, level + 1)] = generate_block(shape, block, level + 1)
+    return data
+
+
+def generate_configs(shape: Shape) -> List[Dict[str, Any]]:
+    files: List[Dict[str, Any]] = [{} for _ in range(max(shape.files, 1))]
+    for block, target in zip(range(shape.blocks), itertools.cycle(files)):
+        target[block_key(block, 0)] = generate_block(shape, block, 0)
+    return files
+
+
+def write_project(root: Path, shape: Shape, package: str, backend: YamlBackend) -> Path:
+    """ Writes the project for `shape` to `root` with the models in `<package>/models.py`; returns the config folder. """
+    package_path = root / package
+    config_path = package_path / "config"
+    config_path.mkdir(parents=True, exist_ok=True)
+
+    (package_path / "__init__.py").write_text("", encoding="utf-8")
+    (package_path / "models.py").write_text(generate_models(shape), encoding="utf-8")
+    (root / ".service.yml").write_text(
+        f"developer_mode: {shape.dev_values}\n"
+        f"models_path: {package}/models.py\n"
+        f"configs_path: {package}/config\n",
+        encoding="utf-8",
+    )
+
+    for index, data in enumerate(generate_configs(shape)):
+        with open(config_path / f"settings_{index:03}.yml", "w", encoding="utf-8") as file:
+            backend.dump(data, file, default_flow_style=False)
+
+    return config_path
@@ -0,0 +1,69 @@
+"""
+Compares the pure-Python and LibYAML backends of `confhub.core.parsing.YamlBackend`
+on large generated configuration files.
+
+Usage:
+    python -m benchmarks.yaml_backends [--blocks 200] [--fields 100] [--repeat 3]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from confhub.core.parsing import YamlBackend, YamlFileMerger, LIBYAML_AVAILABLE
+
+
+def generate_config(blocks: int, fields: int) -> dict:
+    return {
+        f"block_{b}": {
+            **{f"field_{f}": f"str; value_{b}_{f}; dev_{b}_{f}" for f in range(fields)},
+            "ports": [f"int; {8000 + f}" for f in range(fields)],
+        }
+        for b in range(blocks)
+    }
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--fields", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not LIBYAML_AVAILABLE:
+        print("PyYAML was built without LibYAML, only the python backend is measured")
+
+    data = generate_config(args.blocks, args.fields)
+    backends = [YamlBackend(YamlBackend.PYTHON)]
+    if LIBYAML_AVAILABLE:
+        backends.append(YamlBackend(YamlBackend.LIBYAML))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "settings.yml"
+        path.write_text(YamlBackend(YamlBackend.PYTHON).dump(data, default_flow_style=False), encoding="utf-8")
+        print(f"File size: {path.stat().st_size / 1024 / 1024:.2f} MiB")
+
+        results = {}
+        for backend in backends:
+            load = best_of(args.repeat, lambda: YamlFileMerger(path, backend=backend))
+            dump = best_of(args.repeat, lambda: backend.dump(data, default_flow_style=False))
+            results[backend.name] = (load, dump)
+            print(f"{backend.name:>8}: load {load:.3f}s, dump {dump:.3f}s")
+
+        if len(results) == 2:
+            python_load, python_dump = results[YamlBackend.PYTHON]
+            libyaml_load, libyaml_dump = results[YamlBackend.LIBYAML]
+            print(f" speedup: load x{python_load / libyaml_load:.1f}, dump x{python_dump / libyaml_dump:.1f}")
+
+
+if __name__ == '__main__':
+    main()
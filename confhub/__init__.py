@@ -1,6 +1,21 @@
+from typing import TYPE_CHECKING
+
 from confhub.core.fields import field, exclude
 from confhub.core.block import BlockCore
-from confhub.reader import Confhub
+
+if TYPE_CHECKING:
+    from confhub.reader import Confhub
 
 
 __all__ = ["field", "exclude", "BlockCore", "Confhub"]
+
+
+def __getattr__(name: str):
+    # The reader pulls in PyYAML, structlog and the logging setup: load it only when `Confhub` is used,
+    # so modules that merely declare models stay cheap to import
+    if name == "Confhub":
+        from confhub.reader import Confhub
+
+        globals()["Confhub"] = Confhub
+        return Confhub
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
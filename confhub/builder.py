@@ -1,12 +1,13 @@
 from pathlib import Path
-from typing import List, Any, Dict, Type
+from typing import List, Any, Dict, Type, Optional
 
-import yaml
 import structlog
 
 from confhub.core.block import BlockCore
 from confhub.core.error import ConfhubError
 from confhub.core.fields import ConfigurationField
+from confhub.core.parsing import YamlBackend
+from confhub.utils.files import write_text_atomic
 from confhub.utils.gitignore import add_to_gitignore
 
 logger: structlog.BoundLogger = structlog.get_logger("confhub")
@@ -20,33 +21,82 @@ def has_configuration_fields(select_class: BlockCore) -> bool:
     raise ConfhubError("Cannot find field in model object", select_class=select_class)
 
 
+def copy_skeleton(data: Any) -> Any:
+    """ Copies the dicts and lists of a memoized skeleton, so that every place in the output owns its nodes. """
+    if isinstance(data, dict):
+        return {key: copy_skeleton(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [copy_skeleton(value) for value in data]
+    return data
+
+
+def prune(data: Any) -> Any:
+    """ Drops empty dicts, lists and values bottom-up in one walk. """
+    if isinstance(data, dict):
+        pruned = {}
+        for key, value in data.items():
+            value = prune(value)
+            if value:
+                pruned[key] = value
+        return pruned
+    if isinstance(data, list):
+        return [value for value in map(prune, data) if value]
+    return data
+
+
 class ConfigurationBuilder:
+    """
+    Generates the configuration files skeleton from the models.
+
+    The skeleton of every nested block is built once per class and copied wherever the block is used,
+    so generation is linear in the size of the output even with deeply nested, shared blocks.
+    """
+
     def __init__(self, *blocks: BlockCore):
         self.blocks = list(blocks)
         self.datafiles: Dict[str, Any] = {'settings': {}, '.secrets': {}}
+        self._field_skeletons: Dict[Type[BlockCore], Dict[str, Any]] = {}
+        self._nested_skeletons: Dict[Type[BlockCore], Dict[str, Any]] = {}
         self.generate_filenames()
 
-    def data_typing(self, field: ConfigurationField) -> Any:
-        if isinstance(field.data_type, BlockCore):
-            nested_block = {
-                nested_field_name: self.data_typing(nested_field)
-                for nested_field_name, nested_field in field.data_type.__class__.__dict__.items()
+    def field_skeleton(self, block_class: Type[BlockCore]) -> Dict[str, Any]:
+        """ Memoized skeleton of the fields of `block_class`, shared: never mutate it. """
+        skeleton = self._field_skeletons.get(block_class)
+        if skeleton is None:
+            skeleton = self._field_skeletons[block_class] = {
+                nested_field_name: self._typing(nested_field)
+                for nested_field_name, nested_field in block_class.__dict__.items()
                 if isinstance(nested_field, ConfigurationField)
             }
+        return skeleton
+
+    def nested_skeleton(self, nested_model: Type[BlockCore]) -> Dict[str, Any]:
+        """ Memoized skeleton of a block used in a list, shared: never mutate it. """
+        skeleton = self._nested_skeletons.get(nested_model)
+        if skeleton is None:
+            content: Dict[str, Any] = {}
+            for nested_field_name, nested_field in nested_model.__dict__.items():
+                if isinstance(nested_field, ConfigurationField):
+                    content[nested_field_name] = (
+                        [self.nested_skeleton(nested_field.data_type.__class__)] if isinstance(nested_field.data_type, BlockCore) else
+                        self._typing(nested_field)
+                    )
+                elif isinstance(nested_field, BlockCore):
+                    content[nested_field_name] = [self.nested_skeleton(nested_field.__class__)]
+            skeleton = self._nested_skeletons[nested_model] = {nested_model.__block__: content}
+        return skeleton
+
+    def _typing(self, field: ConfigurationField) -> Any:
+        if isinstance(field.data_type, BlockCore):
+            nested_block = self.field_skeleton(field.data_type.__class__)
             return [nested_block] if field.is_list else nested_block
         return [field.get_default_value()] if field.is_list else field.get_default_value()
 
+    def data_typing(self, field: ConfigurationField) -> Any:
+        return copy_skeleton(self._typing(field))
+
     def new_nested(self, nested_model: Type[BlockCore]):
-        nested_block = {nested_model.__block__: {}}
-        for nested_field_name, nested_field in nested_model.__dict__.items():
-            if isinstance(nested_field, ConfigurationField):
-                nested_block[nested_model.__block__][nested_field_name] = (
-                    [self.new_nested(nested_field.data_type.__class__)] if isinstance(nested_field.data_type, BlockCore) else
-                    self.data_typing(nested_field)
-                )
-            elif isinstance(nested_field, BlockCore):
-                nested_block[nested_model.__block__][nested_field_name] = [self.new_nested(nested_field.__class__)]
-        return nested_block
+        return copy_skeleton(self.nested_skeleton(nested_model))
 
     def add_field_to_datafiles(
             self, field_name: str, field: ConfigurationField, parent_path: List[str]
@@ -67,11 +117,7 @@ class ConfigurationBuilder:
         elif field.is_list:
             current[field_name] = [field.get_default_value()]
         elif isinstance(field.data_type, BlockCore):
-            current[field_name] = {
-                nested_field_name: self.data_typing(nested_field)
-                for nested_field_name, nested_field in field.data_type.__class__.__dict__.items()
-                if isinstance(nested_field, ConfigurationField)
-            }
+            current[field_name] = copy_skeleton(self.field_skeleton(field.data_type.__class__))
         else:
             current[field_name] = field.get_default_value()
 
@@ -98,30 +144,37 @@ class ConfigurationBuilder:
 
     @staticmethod
     def remove_empty_dicts(data):
-        if isinstance(data, dict):
-            return {k: ConfigurationBuilder.remove_empty_dicts(v) for k, v in data.items() if v and ConfigurationBuilder.remove_empty_dicts(v)}
-        elif isinstance(data, list):
-            return [ConfigurationBuilder.remove_empty_dicts(v) for v in data if v and ConfigurationBuilder.remove_empty_dicts(v)]
-        return data
-
-    def create_files(self, config_path: Path) -> None:
+        return prune(data)
+
+    def create_files(self, config_path: Path, backend: Optional[YamlBackend] = None) -> None:
+        """
+        Writes the configuration files, merging into existing ones.
+        Files whose content would not change are left untouched, so their mtime stays the same;
+        the others are replaced atomically. `.gitignore` is updated once for all dot-files.
+        """
+        backend = backend or YamlBackend()
         datafiles = self.remove_empty_dicts(self.datafiles)
+        gitignore = []
         for filename, data in datafiles.items():
             file_path = config_path / f'{filename}.yml'
 
+            existing = None
             if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    yaml_data = yaml.safe_load(file)
-                    if yaml_data:
-                        for key, value in data.items():
-                            if key in yaml_data and isinstance(yaml_data[key], dict):
-                                yaml_data[key].update(value)
-                                data[key] = yaml_data[key]
-
-            with open(file_path, 'w', encoding='utf-8') as file:
-                yaml.dump(data, file, default_flow_style=False)
+                existing = file_path.read_text(encoding='utf-8')
+                yaml_data = backend.load(existing)
+                if yaml_data:
+                    for key, value in data.items():
+                        if key in yaml_data and isinstance(yaml_data[key], dict):
+                            yaml_data[key].update(value)
+                            data[key] = yaml_data[key]
 
             if filename.startswith('.'):
-                add_to_gitignore(f"{filename}.*")
+                gitignore.append(f"{filename}.*")
+
+            if write_text_atomic(file_path, backend.dump(data, default_flow_style=False), existing=existing):
+                logger.info("Create file", path=file_path)
+            else:
+                logger.debug("File is up to date", path=file_path)
 
-            logger.info("Create file", path=file_path)
+        if gitignore:
+            add_to_gitignore(*gitignore)
@@ -1,13 +1,16 @@
+import json
+import sys
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import structlog
 
 from confhub import templates, BlockCore
 from confhub.builder import ConfigurationBuilder
 from confhub.core.error import ConfhubError
-from confhub.core.parsing import get_service_data
+from confhub.core.parsing import get_service_data, YamlBackend, config_files
 from confhub.utils.__models import get_models_from_path
+from confhub.utils.__static import get_models_static
 from confhub.utils.gitignore import add_to_gitignore
 
 logger: structlog.BoundLogger = structlog.getLogger('confhub')
@@ -57,15 +60,105 @@ def init(folder: str) -> None:
 def generate_models() -> None:
     """
     Receives models from a models file and generates a configuration based on them.
+    The models file is read statically when possible, so it is imported only if it cannot be understood without running it.
     """
     service_data = get_service_data()
 
-    models: List[BlockCore] = get_models_from_path(data=service_data)
+    models: List[BlockCore] = get_models_static(data=service_data) or get_models_from_path(data=service_data)
 
     _config_path = service_data.get('configs_path')
     if not _config_path or not isinstance(_config_path, str):
         raise ValueError("Directory `config` not defined")
 
-    ConfigurationBuilder(*models).create_files(Path.cwd() / Path(_config_path))
+    ConfigurationBuilder(*models).create_files(
+        Path.cwd() / Path(_config_path),
+        backend=YamlBackend(service_data.get('yaml_backend'))
+    )
 
     logger.info("Configuration successfully generated")
+
+
+def check(roots: List[str], jobs: Optional[int] = None, output: Optional[str] = None) -> None:
+    """
+    Validates the configurations of many projects (folders with a `.service.yml`) in parallel and writes a JSON report
+    listing every missing or badly typed value. Exits with code 1 if any project is invalid.
+    """
+    from confhub.core.check import check_services, quiet_logging
+
+    quiet_logging()
+    report = check_services(roots or ['.'], max_workers=jobs)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    for service in report['services']:
+        for error in service['errors']:
+            print(f"{service['root']}: {error['message']}", file=sys.stderr)
+
+    if not report['ok']:
+        sys.exit(1)
+
+
+def render(environments: List[str], output: Optional[str] = None) -> None:
+    """
+    Renders the environments defined in `.service.yml` (all of them if none are named): the base configuration is parsed once,
+    each environment's overlays are merged over it and the configuration resolved for its `developer_mode` is written to `<output>/<environment>/`.
+    """
+    from confhub.core.environments import EnvironmentRenderer, environments_from_service, write_tree
+
+    service_data = get_service_data()
+
+    _config_path = service_data.get('configs_path')
+    if not _config_path or not isinstance(_config_path, str):
+        raise ValueError("Directory `config` not defined")
+
+    defined = {environment.name: environment for environment in environments_from_service(service_data)}
+    unknown = [name for name in environments or [] if name not in defined]
+    if unknown:
+        raise ConfhubError(f"Unknown environments: {', '.join(unknown)}")
+
+    models: List[BlockCore] = get_models_from_path(data=service_data)
+    backend = YamlBackend(service_data.get('yaml_backend'))
+    renderer = EnvironmentRenderer(models, config_files(Path(_config_path)), backend=backend)
+
+    output_path = Path(output or 'rendered')
+    for name in environments or list(defined):
+        rendered = renderer.render(defined[name])
+        write_tree(rendered, output_path, backend=backend)
+        logger.info(
+            "Environment rendered",
+            environment=name,
+            blocks=len(rendered.blocks),
+            shared=len(rendered.shared),
+        )
+
+    # Rendered trees contain the secrets as well
+    add_to_gitignore(f"{output_path.as_posix()}/")
+
+
+def serve(socket: Optional[str] = None) -> None:
+    """
+    Loads the configuration once and serves the converted blocks to `Confhub(daemon=True)` clients over a Unix socket,
+    pushing changes to subscribed clients. Runs until interrupted.
+    """
+    import signal
+    import threading
+
+    from confhub.core.daemon import ConfigDaemon
+    from confhub.reader import Confhub
+
+    service_data = get_service_data()
+    socket_path = socket or service_data.get('daemon_socket')
+
+    config = Confhub(watch=True, lazy=False, compact=False, daemon=False)
+    daemon = ConfigDaemon(config, socket_path if isinstance(socket_path, str) else None)
+
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.shutdown).start())
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
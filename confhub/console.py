@@ -24,6 +24,40 @@ class CommandLineInterface:
                         help="Folder is specified",
                     ),
                 ),
+                "roots": dict(
+                    kwargs=dict(
+                        nargs="*",
+                        default=["."],
+                        help="Project folders with a `.service.yml` (default: current folder)",
+                    ),
+                ),
+                "environments": dict(
+                    kwargs=dict(
+                        nargs="*",
+                        help="Environments from `.service.yml` (default: all)",
+                    ),
+                ),
+                "jobs": dict(
+                    flags=["-j", "--jobs"],
+                    kwargs=dict(
+                        type=int,
+                        help="Number of worker processes (default: number of CPUs)",
+                    ),
+                ),
+                "output": dict(
+                    flags=["-o", "--output"],
+                    kwargs=dict(
+                        type=str,
+                        help="File or folder to write the result to",
+                    ),
+                ),
+                "socket": dict(
+                    flags=["--socket"],
+                    kwargs=dict(
+                        type=str,
+                        help="Unix socket path (default: `daemon_socket` from .service.yml or a per-project socket)",
+                    ),
+                ),
             }
 
             for arg, metadata in function_arguments.items():
@@ -1,26 +1,87 @@
-from typing import Type
+from typing import Type, Callable, Dict, Any, List
 
 from confhub.core.fields import ConfigurationField
-from confhub.core.parsing import parsing_value
+
+
+def unwrap_block(block: Type['BlockCore'], value: Any) -> Any:
+    """ List items of a block field are generated as `{<__block__>: {...}}`, plain mappings are accepted too. """
+    if isinstance(value, dict) and len(value) == 1 and block.__block__ in value:
+        return value[block.__block__]
+    return value
+
+
+def compile_load_plan(cls: Type['BlockCore']) -> Callable[[dict, bool], 'BlockCore']:
+    """
+    Compiles `cls` into a loader function: one statement per field, in declaration order,
+    with the converters and nested blocks bound as constants, so loading does no reflection.
+    """
+    # Imported here so that declaring models does not load PyYAML
+    from confhub.core.parsing import parsing_value, parsing_list
+
+    namespace: Dict[str, Any] = {
+        'cls': cls,
+        'parsing_value': parsing_value,
+        'parsing_list': parsing_list,
+        'unwrap_block': unwrap_block,
+    }
+    lines: List[str] = [
+        "def load(data, development_mode):",
+        "    instance = cls()",
+        "    attrs = instance.__dict__",
+    ]
+
+    for index, (attr_name, attr_value) in enumerate(cls.__dict__.items()):
+        if isinstance(attr_value, ConfigurationField):
+            namespace[f'missing_{index}'] = (
+                f"The value for `{cls.__block__}.{attr_name}` could not be found, perhaps the file was not transferred"
+            )
+            lines += [
+                f"    value = data.get({attr_name!r})",
+                "    if value is None:",
+                f"        raise ValueError(missing_{index})",
+            ]
+
+            if isinstance(attr_value.data_type, BlockCore):
+                namespace[f'block_{index}'] = attr_value.data_type.__class__
+                if attr_value.is_list:
+                    lines.append(
+                        f"    attrs[{attr_name!r}] = [block_{index}.from_dict(unwrap_block(block_{index}, item), development_mode) for item in value]"
+                    )
+                else:
+                    lines.append(f"    attrs[{attr_name!r}] = block_{index}.from_dict(value, development_mode)")
+            elif attr_value.is_list:
+                lines.append(
+                    f"    attrs[{attr_name!r}] = parsing_list(value, development_mode, {bool(attr_value.packed)!r}) "
+                    f"if isinstance(value, list) else parsing_value(value, development_mode)"
+                )
+            else:
+                lines.append(f"    attrs[{attr_name!r}] = parsing_value(value, development_mode)")
+
+        elif isinstance(attr_value, BlockCore):
+            namespace[f'block_{index}'] = attr_value.__class__
+            lines.append(
+                f"    attrs[{attr_name!r}] = block_{index}.from_dict(data.get({attr_value.__block__!r}), development_mode)"
+            )
+
+    lines.append("    return instance")
+
+    exec(compile('\n'.join(lines), f"<confhub load plan {cls.__module__}.{cls.__qualname__}>", 'exec'), namespace)
+    return namespace['load']
 
 
 class BlockCore:
     __block__ = None
 
+    @classmethod
+    def load_plan(cls) -> Callable[[dict, bool], 'BlockCore']:
+        """ Returns the compiled loader of this class, compiling it on first use. """
+        plan = cls.__dict__.get('__load_plan__')
+        if plan is None:
+            plan = compile_load_plan(cls)
+            cls.__load_plan__ = plan
+        return plan
+
     @classmethod
     def from_dict(cls, data: dict, development_mode: bool):
         if data:
-            instance = cls()
-
-            for attr_name, attr_value in instance.__class__.__dict__.items():
-                if isinstance(attr_value, ConfigurationField):
-                    value_str = data.get(attr_name)
-                    if value_str is not None:
-                        value = parsing_value(value_str, development_mode)
-                        setattr(instance, attr_name, value)
-                    else:
-                        raise ValueError(f"The value for `{cls.__block__}.{attr_name}` could not be found, perhaps the file was not transferred")
-                elif isinstance(attr_value, BlockCore):
-                    setattr(instance, attr_name, attr_value.from_dict(data.get(attr_value.__block__), development_mode))
-
-            return instance
+            return cls.load_plan()(data, development_mode)
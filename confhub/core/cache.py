@@ -0,0 +1,85 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import structlog
+
+from confhub.__meta__ import __version__
+from confhub.utils.files import owned_by_user
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+
+def fingerprint(*sources: str | Path, salt: str = "") -> str:
+    """ Hash of the path, size, mtime and content of every source file, plus the confhub version and `salt`. """
+    digest = hashlib.blake2b(f"{__version__};{salt}".encode(), digest_size=32)
+    for source in map(Path, sources):
+        digest.update(str(source.resolve()).encode())
+        try:
+            stat = source.stat()
+            content = source.read_bytes()
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+            continue
+
+        digest.update(f"{stat.st_size};{stat.st_mtime_ns}".encode())
+        digest.update(hashlib.blake2b(content, digest_size=32).digest())
+
+    return digest.hexdigest()
+
+
+class ConfigCache:
+    """
+    On-disk snapshot of the merged and type-converted configuration.
+
+    The snapshot is keyed on the path, size, mtime and content hash of every source file
+    (`.service.yml`, the models module and the configuration files), so any change to the
+    inputs invalidates it automatically.
+    """
+    FILENAME = "confhub.cache"
+
+    def __init__(self, cache_dir: str | Path, *sources: str | Path, salt: str = "") -> None:
+        self.cache_file = Path(cache_dir) / self.FILENAME
+        self.sources = [Path(source) for source in sources]
+        self.salt = salt
+        self.key = self.fingerprint()
+
+    def fingerprint(self) -> str:
+        return fingerprint(*self.sources, salt=self.salt)
+
+    def load(self) -> Optional[Any]:
+        try:
+            with open(self.cache_file, 'rb') as file:
+                if not owned_by_user(os.fstat(file.fileno())):
+                    # Unpickling runs code: a cache another user can write to is a miss
+                    logger.warning("Configuration cache is not owned by the current user, ignored", path=self.cache_file)
+                    return None
+                key, payload = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.debug("Configuration cache is unreadable", path=self.cache_file, err=err)
+            return None
+
+        if key != self.key:
+            logger.debug("Configuration cache is outdated", path=self.cache_file)
+            return None
+
+        return payload
+
+    def dump(self, payload: Any) -> None:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_file.parent, prefix=f".{self.FILENAME}.")
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    pickle.dump((self.key, payload), file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.cache_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as err:
+            logger.warning("Failed to write configuration cache", path=self.cache_file, err=err)
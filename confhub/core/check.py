@@ -0,0 +1,183 @@
+import contextlib
+import dataclasses
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+from confhub.core.block import BlockCore, unwrap_block
+from confhub.core.fields import ConfigurationField
+
+
+@dataclasses.dataclass
+class CheckError:
+    """
+    Attributes:
+    path (str): Dotted path of the value, with `[index]` for list items, e.g. `postgresql.port`.
+    kind (str): `missing`, `type` (value cannot be converted), `structure` (mapping/list expected) or `load`.
+    message (str): Human-readable description.
+    """
+    path: str
+    kind: str
+    message: str
+
+
+def validate_block(block: Type[BlockCore], data: Any, development_mode: bool, path: str) -> List[CheckError]:
+    """
+    Walks `data` the way `block.from_dict` does, but collects every missing or badly typed value
+    instead of stopping at the first one.
+    """
+    # Imported here so that declaring models does not load PyYAML
+    from confhub.core.parsing import parsing_value
+
+    if not isinstance(data, dict):
+        return [CheckError(path, 'structure', f"`{path}` must be a mapping")]
+
+    errors: List[CheckError] = []
+    for attr_name, attr_value in block.__dict__.items():
+        attr_path = f"{path}.{attr_name}"
+        if isinstance(attr_value, ConfigurationField):
+            value = data.get(attr_name)
+            if value is None:
+                errors.append(CheckError(attr_path, 'missing', f"The value for `{attr_path}` could not be found"))
+            elif isinstance(attr_value.data_type, BlockCore):
+                nested = attr_value.data_type.__class__
+                if not attr_value.is_list:
+                    errors += validate_block(nested, value, development_mode, attr_path)
+                elif not isinstance(value, list):
+                    errors.append(CheckError(attr_path, 'structure', f"`{attr_path}` must be a list"))
+                else:
+                    for position, item in enumerate(value):
+                        errors += validate_block(nested, unwrap_block(nested, item), development_mode, f"{attr_path}[{position}]")
+            else:
+                items = enumerate(value) if attr_value.is_list and isinstance(value, list) else [(None, value)]
+                for position, item in items:
+                    item_path = attr_path if position is None else f"{attr_path}[{position}]"
+                    if not isinstance(item, (str, list)):
+                        errors.append(CheckError(
+                            item_path, 'type', f"`{item_path}`: expected `<type>; <value>`, got {type(item).__name__} `{item}`"
+                        ))
+                        continue
+                    try:
+                        parsing_value(item, development_mode)
+                    except (ValueError, TypeError, AttributeError) as err:
+                        errors.append(CheckError(item_path, 'type', f"`{item_path}`: {err}"))
+
+        elif isinstance(attr_value, BlockCore):
+            # `from_dict` skips a nested block that is not configured
+            nested_data = data.get(attr_value.__block__)
+            if nested_data:
+                errors += validate_block(attr_value.__class__, nested_data, development_mode, f"{path}.{attr_name}")
+
+    return errors
+
+
+def load_models(service_data: Dict[str, Any]) -> List[Type[BlockCore]]:
+    from confhub.utils.__models import get_models_from_path
+    from confhub.utils.__static import get_models_static
+
+    # Checking only reads the project, the static index is not written to its `__pycache__`
+    models = get_models_static(service_data, cache=False)
+    if models is not None:
+        return models
+
+    # Services checked by the same worker may use the same module name for their models
+    module_path = Path(service_data.get('models_path'))
+    module_name = '.'.join(module_path.parts[-2:]).replace('.py', '')
+    for name in [module_name, module_name.rpartition('.')[0]]:
+        sys.modules.pop(name, None)
+    importlib.invalidate_caches()
+    return get_models_from_path(service_data)
+
+
+def check_service(root: str) -> Dict[str, Any]:
+    """ Validates the configuration of the project whose `.service.yml` is in `root`; returns its report entry. """
+    from confhub.core.parsing import YamlBackend, YamlFileMerger, config_files, get_service_data
+
+    start = time.perf_counter()
+    report: Dict[str, Any] = {'root': str(root), 'ok': False, 'errors': [], 'unconfigured': []}
+
+    cwd, sys_path = os.getcwd(), list(sys.path)
+    try:
+        os.chdir(root)
+        service_data = get_service_data()
+        configs_path = service_data.get('configs_path')
+        if not configs_path or not isinstance(configs_path, str):
+            raise ValueError("Directory `config` not defined")
+
+        development_mode = bool(service_data.get('developer_mode'))
+        models = load_models(service_data)
+        data = YamlFileMerger(
+            *config_files(Path(configs_path)),
+            backend=YamlBackend(service_data.get('yaml_backend')),
+            parallel_threshold=None,
+        ).data
+
+        errors: List[CheckError] = []
+        for block in models:
+            if not block.__block__:
+                continue
+            block_data = data.get(block.__block__)
+            if not block_data:
+                report['unconfigured'].append(block.__block__)
+                continue
+            errors += validate_block(block, block_data, development_mode, block.__block__)
+    except Exception as err:
+        errors = [CheckError('', 'load', f"{type(err).__name__}: {err}")]
+    finally:
+        os.chdir(cwd)
+        sys.path[:] = sys_path
+
+    report['errors'] = [dataclasses.asdict(error) for error in errors]
+    report['ok'] = not errors
+    report['seconds'] = round(time.perf_counter() - start, 6)
+    return report
+
+
+def quiet_logging() -> None:
+    """ Keeps log output off stdout, where the report may be written. """
+    import logging
+
+    import structlog
+
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING),
+        logger_factory=structlog.PrintLoggerFactory(sys.stderr),
+    )
+
+
+@contextlib.contextmanager
+def quieted_logging() -> Iterator[None]:
+    """ `quiet_logging` for checks run in the calling process; the previous structlog configuration is restored. """
+    import structlog
+
+    previous = structlog.get_config()
+    quiet_logging()
+    try:
+        yield
+    finally:
+        structlog.configure(**previous)
+
+
+def check_services(roots: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """ Validates every root in a process pool and returns the combined report. """
+    roots = [str(Path(root).resolve()) for root in roots]
+    start = time.perf_counter()
+
+    if len(roots) == 1 or max_workers == 1:
+        with quieted_logging():
+            services = [check_service(root) for root in roots]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=quiet_logging) as executor:
+            services = list(executor.map(check_service, roots))
+
+    return {
+        'ok': all(service['ok'] for service in services),
+        'services': services,
+        'checked': len(services),
+        'failed': sum(not service['ok'] for service in services),
+        'seconds': round(time.perf_counter() - start, 6),
+    }
@@ -0,0 +1,374 @@
+import contextlib
+import getpass
+import hashlib
+import json
+import os
+import pickle
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import structlog
+
+from confhub.core.block import BlockCore
+from confhub.core.lazy import PendingBlock
+from confhub.utils.files import owned_by_user
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+FRAME = struct.Struct(">I")
+
+
+def runtime_dir() -> Path:
+    """ Per-user folder for sockets: `$XDG_RUNTIME_DIR/confhub`, or `<tmp>/confhub-<uid>` without it. """
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return Path(os.environ['XDG_RUNTIME_DIR']) / 'confhub'
+    user = os.getuid() if hasattr(os, 'getuid') else getpass.getuser()
+    return Path(tempfile.gettempdir()) / f"confhub-{user}"
+
+
+def default_socket_path(root: Optional[Path] = None) -> Path:
+    """ Socket shared by `confhub serve` and the clients started in the same project folder. """
+    root = (root or Path.cwd()).resolve()
+    return runtime_dir() / f"confhub-{hashlib.sha1(str(root).encode()).hexdigest()[:12]}.sock"
+
+
+def private_dir(path: Path) -> None:
+    """ Creates the socket folder with mode 0700; refuses an existing one that other users control. """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"`{path}` must be a folder owned by the current user with mode 0700")
+
+
+def peer_uid(conn: socket.socket) -> Optional[int]:
+    """ Uid of the process at the other end of a Unix socket, None where the platform does not tell. """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    credentials = struct.Struct("3i")
+    _, uid, _ = credentials.unpack(conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size))
+    return uid
+
+
+def trusted_peer(conn: socket.socket, socket_path: Path) -> bool:
+    """
+    Whether the other end runs as the current user (or root). Both sides exchange pickles, so a socket created by
+    another user must never be used. Without peer credentials the socket file must be owned by the current user
+    and not accessible to others.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    uid = peer_uid(conn)
+    if uid is not None:
+        return uid in (os.getuid(), 0)
+    try:
+        info = os.lstat(socket_path)
+    except OSError:
+        return False
+    return owned_by_user(info) and not info.st_mode & 0o077
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            raise ConnectionError("Connection closed by the peer")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any], payloads: Iterable[bytes] = ()) -> None:
+    """ Sends a length-prefixed JSON message followed by raw payloads (their lengths are part of the message). """
+    header = json.dumps(message).encode()
+    sock.sendall(b"".join([FRAME.pack(len(header)), header, *payloads]))
+
+
+def recv_message(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+class DaemonBlock(PendingBlock):
+    """ Block served by `confhub serve`; fetched from the daemon on first access. """
+    __slots__ = ('client', 'name')
+
+    def __init__(self, client: 'DaemonClient', name: str) -> None:
+        self.client = client
+        self.name = name
+
+    def load(self) -> Optional[BlockCore]:
+        return self.client.fetch(self.name)
+
+
+class ConfigDaemon:
+    """
+    Serves the converted blocks of one project over a Unix domain socket.
+
+    The configuration is loaded once by a watching `Confhub`; every block is pickled once per version and sent
+    to clients on request. Subscribed clients are told which blocks changed after each reload.
+    Clients unpickle what the daemon sends, so the socket lives in a private per-user folder with mode 0600,
+    and both sides check that the peer runs as the same user.
+
+    Requests (JSON, length-prefixed):
+        {"op": "hello", "developer_mode": bool, "configs_path": absolute str, "overrides": {...}}
+            -> {"ok": true, "version": int, "blocks": [...]}
+        {"op": "get", "blocks": [...]} -> {"ok": true, "version": int, "sizes": {name: int | null}} + pickled blocks
+        {"op": "subscribe"} -> {"ok": true, "version": int}, then {"op": "changed", "version": int, "blocks": [...]}
+    """
+
+    def __init__(self, config: Any, socket_path: Optional[str | Path] = None) -> None:
+        self.config = config
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.version = 0
+        self.payloads: Dict[str, bytes] = {}
+        self.subscribers: List[socket.socket] = []
+        self.server: Optional[socketserver.ThreadingUnixStreamServer] = None
+        self._lock = threading.Lock()
+        # Concurrent reloads must not interleave their frames on a subscriber connection
+        self._push_lock = threading.Lock()
+
+        self.publish(config.blocks())
+        config.subscribe(self.on_reload)
+
+    def publish(self, blocks: Dict[str, BlockCore]) -> None:
+        payloads = {name: pickle.dumps(block, protocol=pickle.HIGHEST_PROTOCOL) for name, block in blocks.items()}
+        with self._lock:
+            self.payloads = payloads
+            self.version += 1
+
+    def on_reload(self, models: Any, change: Any) -> None:
+        with self._push_lock:
+            self.publish(self.config.blocks())
+
+            message = {'op': 'changed', 'version': self.version, 'blocks': list(change.blocks)}
+            with self._lock:
+                subscribers = list(self.subscribers)
+            for conn in subscribers:
+                try:
+                    send_message(conn, message)
+                except OSError:
+                    self.drop_subscriber(conn)
+
+        logger.info('Configuration pushed to subscribers', version=self.version, blocks=change.blocks, subscribers=len(subscribers))
+
+    def drop_subscriber(self, conn: socket.socket) -> None:
+        with self._lock:
+            if conn in self.subscribers:
+                self.subscribers.remove(conn)
+
+    def handle(self, conn: socket.socket) -> None:
+        if not trusted_peer(conn, self.socket_path):
+            logger.warning('Configuration daemon refused a client of another user', socket=self.socket_path, uid=peer_uid(conn))
+            return
+
+        try:
+            while True:
+                request = recv_message(conn)
+                op = request.get('op')
+                if op == 'hello':
+                    self.handle_hello(conn, request)
+                elif op == 'get':
+                    with self._lock:
+                        version, payloads = self.version, self.payloads
+                    names = [name for name in request.get('blocks', []) if isinstance(name, str)]
+                    send_message(
+                        conn,
+                        {'ok': True, 'version': version, 'sizes': {name: len(payloads[name]) if name in payloads else None for name in names}},
+                        [payloads[name] for name in names if name in payloads],
+                    )
+                elif op == 'subscribe':
+                    with self._push_lock, self._lock:
+                        self.subscribers.append(conn)
+                        send_message(conn, {'ok': True, 'version': self.version})
+                else:
+                    send_message(conn, {'ok': False, 'error': f"Unknown request `{op}`"})
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.drop_subscriber(conn)
+
+    def handle_hello(self, conn: socket.socket, request: Dict[str, Any]) -> None:
+        configs_path = Path(str(request.get('configs_path')))
+        if not configs_path.is_absolute() or configs_path.resolve() != self.config.config_path.resolve():
+            send_message(conn, {'ok': False, 'error': f"Daemon serves `{self.config.config_path.resolve()}`"})
+        elif bool(request.get('developer_mode')) != bool(self.config.developer_mode):
+            send_message(conn, {'ok': False, 'error': f"Daemon runs with developer_mode={bool(self.config.developer_mode)}"})
+        elif (request.get('overrides') or {}) != self.config.overrides:
+            send_message(conn, {'ok': False, 'error': "Daemon runs with other environment overrides"})
+        else:
+            with self._lock:
+                send_message(conn, {'ok': True, 'version': self.version, 'blocks': sorted(self.payloads)})
+
+    def serve_forever(self) -> None:
+        """ Serves until `shutdown` is called or the process is interrupted; removes the socket afterwards. """
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                daemon.handle(self.request)
+
+        if self.socket_path.parent == runtime_dir():
+            private_dir(self.socket_path.parent)
+        else:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+        self.server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        os.chmod(self.socket_path, 0o600)
+        self.server.daemon_threads = True
+
+        logger.info('Configuration daemon started', socket=self.socket_path, blocks=sorted(self.payloads))
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+            self.config.close()
+            logger.info('Configuration daemon stopped', socket=self.socket_path)
+
+    def shutdown(self) -> None:
+        if self.server:
+            self.server.shutdown()
+
+
+class DaemonClient:
+    """
+    Connection of a `Confhub` client to `confhub serve`.
+
+    Blocks are fetched one by one when first accessed. If the daemon stops answering, `fallback(name)`
+    loads the block directly from the configuration files instead.
+    """
+
+    def __init__(
+            self,
+            socket_path: Path,
+            conn: socket.socket,
+            version: int,
+            blocks: List[str],
+            fallback: Callable[[str], Optional[BlockCore]],
+    ) -> None:
+        self.socket_path = socket_path
+        self.conn: Optional[socket.socket] = conn
+        self.version = version
+        self.blocks = blocks
+        self.fallback = fallback
+        self.subscription: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.socket_path} version={self.version}>"
+
+    @classmethod
+    def connect(
+            cls,
+            socket_path: str | Path,
+            developer_mode: bool,
+            configs_path: str | Path,
+            fallback: Callable[[str], Optional[BlockCore]],
+            overrides: Optional[Dict[str, Any]] = None,
+            timeout: float = 1.0,
+    ) -> Optional['DaemonClient']:
+        """ Connects to the daemon at `socket_path`. Returns None if it is not running or serves another configuration. """
+        socket_path = Path(socket_path)
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        try:
+            conn.connect(str(socket_path))
+            if not trusted_peer(conn, socket_path):
+                conn.close()
+                logger.warning('Configuration daemon socket belongs to another user, ignored', socket=socket_path)
+                return None
+            # Absolute, so that the daemon does not resolve it against its own working directory
+            hello = {
+                'op': 'hello',
+                'developer_mode': bool(developer_mode),
+                'configs_path': str(Path(configs_path).resolve()),
+                'overrides': overrides or {},
+            }
+            send_message(conn, hello)
+            reply = recv_message(conn)
+        except (OSError, ValueError) as err:
+            conn.close()
+            logger.debug('Configuration daemon is not available', socket=socket_path, err=err)
+            return None
+
+        if not reply.get('ok'):
+            conn.close()
+            logger.warning('Configuration daemon refused the connection', socket=socket_path, error=reply.get('error'))
+            return None
+
+        conn.settimeout(None)
+        return cls(socket_path, conn, reply['version'], reply['blocks'], fallback)
+
+    def pending(self) -> Dict[str, DaemonBlock]:
+        return {name: DaemonBlock(self, name) for name in self.blocks}
+
+    def fetch(self, name: str) -> Optional[BlockCore]:
+        with self._lock:
+            if self.conn is not None:
+                try:
+                    send_message(self.conn, {'op': 'get', 'blocks': [name]})
+                    reply = recv_message(self.conn)
+                    self.version = reply['version']
+                    size = reply['sizes'].get(name)
+                    return pickle.loads(_recv_exact(self.conn, size)) if size is not None else None
+                except (OSError, ValueError, KeyError) as err:
+                    logger.warning('Configuration daemon is unavailable, loading directly', socket=self.socket_path, err=err)
+                    self.conn.close()
+                    self.conn = None
+
+        return self.fallback(name)
+
+    def subscribe(self, on_change: Callable[[List[str]], None], on_lost: Callable[[], None]) -> None:
+        """ Calls `on_change(blocks)` for every push of the daemon and `on_lost()` once if the connection drops. """
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(str(self.socket_path))
+            if not trusted_peer(conn, self.socket_path):
+                raise PermissionError("The daemon socket belongs to another user")
+            send_message(conn, {'op': 'subscribe'})
+            recv_message(conn)
+        except (OSError, ValueError) as err:
+            conn.close()
+            logger.warning('Failed to subscribe to the configuration daemon', socket=self.socket_path, err=err)
+            on_lost()
+            return
+
+        self.subscription = conn
+
+        def listen() -> None:
+            try:
+                while True:
+                    message = recv_message(conn)
+                    if message.get('op') == 'changed':
+                        on_change(message['blocks'])
+            except (OSError, ValueError):
+                pass
+
+            if self.subscription is conn:
+                logger.warning('Configuration daemon connection lost', socket=self.socket_path)
+                on_lost()
+
+        threading.Thread(target=listen, name='confhub-daemon-client', daemon=True).start()
+
+    def close(self) -> None:
+        subscription, self.subscription = self.subscription, None
+        for conn in (self.conn, subscription):
+            if conn is not None:
+                try:
+                    conn.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                conn.close()
+        self.conn = None
@@ -0,0 +1,176 @@
+import dataclasses
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import structlog
+
+from confhub.core.block import BlockCore
+from confhub.core.parsing import YamlBackend, YamlFileMerger, config_files, merge_overlay, parse_metadata
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+
+@dataclasses.dataclass
+class Environment:
+    """
+    Attributes:
+    name (str): Environment name, e.g. `staging` or `prod-eu`.
+    overlays (List[Path]): Files merged over the base configuration, in order.
+    developer_mode (bool): Whether developer values are selected for this environment.
+    """
+    name: str
+    overlays: List[Path] = dataclasses.field(default_factory=list)
+    developer_mode: bool = False
+
+
+@dataclasses.dataclass
+class RenderedEnvironment:
+    """
+    Configuration of one environment: the merged raw data and the blocks converted in its `developer_mode`.
+    Attributes:
+    environment (Environment): The rendered environment.
+    data (Dict[str, Any]): Merged raw configuration (`type; value; development value` strings); subtrees
+        the overlays do not touch are shared with the base.
+    blocks (Dict[str, BlockCore]): Converted blocks by name.
+    shared (List[str]): Blocks untouched by the overlays, whose converted object is shared with the other environments.
+    """
+    environment: Environment
+    data: Dict[str, Any]
+    blocks: Dict[str, BlockCore]
+    shared: List[str]
+
+    @property
+    def models(self) -> type:
+        """ `Data` class like `Confhub.models`. """
+        return dataclasses.make_dataclass('Data', [
+            (block_name, type(value), dataclasses.field(default=value))
+            for block_name, value in self.blocks.items()
+        ])
+
+
+def overlay_files(paths: Iterable[str | Path]) -> List[Path]:
+    """ Expands folders to their configuration files (sorted by name); files are kept as they are. """
+    files: List[Path] = []
+    for path in map(Path, paths):
+        files += sorted(config_files(path)) if path.is_dir() else [path]
+    return files
+
+
+def environments_from_service(service_data: Dict[str, Any]) -> List[Environment]:
+    """
+    Reads `environments` from `.service.yml`. Every entry is a folder or file, a list of them,
+    or a mapping with `overlays` and `developer_mode`:
+
+        environments:
+          dev:
+            developer_mode: True
+          staging: cfg/envs/staging
+          prod-eu:
+            overlays: [cfg/envs/prod, cfg/envs/prod-eu]
+    """
+    environments = []
+    for name, entry in (service_data.get('environments') or {}).items():
+        developer_mode = bool(service_data.get('developer_mode'))
+        if isinstance(entry, dict):
+            developer_mode = bool(entry.get('developer_mode', developer_mode))
+            entry = entry.get('overlays')
+
+        overlays = [entry] if isinstance(entry, str) else list(entry or [])
+        environments.append(Environment(str(name), overlay_files(overlays), developer_mode))
+
+    return environments
+
+
+class EnvironmentRenderer:
+    """
+    Renders many environments from one base configuration.
+
+    The base files are parsed and merged once, and every overlay file is parsed once even if several
+    environments use it. Overlays are merged without copying the base (`merge_overlay`), and a block whose
+    top-level key no overlay of an environment touches is converted once per `developer_mode` and shared.
+    """
+
+    def __init__(
+            self,
+            models: Iterable[Type[BlockCore]],
+            base_files: Iterable[str | Path],
+            backend: Optional[YamlBackend] = None,
+    ) -> None:
+        self.models = [block for block in models if block.__block__]
+        self.backend = backend or YamlBackend()
+        self.base = YamlFileMerger(*base_files, backend=self.backend).data
+        self._documents: Dict[Path, Any] = {}
+        self._base_blocks: Dict[Tuple[bool, str], Optional[BlockCore]] = {}
+
+    def document(self, path: Path) -> Any:
+        if path not in self._documents:
+            self._documents[path] = YamlFileMerger(path, backend=self.backend).data
+        return self._documents[path]
+
+    def base_block(self, block: Type[BlockCore], developer_mode: bool) -> Optional[BlockCore]:
+        key = (developer_mode, block.__block__)
+        if key not in self._base_blocks:
+            self._base_blocks[key] = block.from_dict(self.base.get(block.__block__), development_mode=developer_mode)
+        return self._base_blocks[key]
+
+    def render(self, environment: Environment) -> RenderedEnvironment:
+        data, touched = self.base, set()
+        for path in environment.overlays:
+            document = self.document(path)
+            if isinstance(document, dict):
+                data = merge_overlay(data, document)
+                touched.update(document)
+
+        blocks, shared = {}, []
+        for block in self.models:
+            if block.__block__ in touched:
+                value = block.from_dict(data.get(block.__block__), development_mode=environment.developer_mode)
+            else:
+                value = self.base_block(block, environment.developer_mode)
+                shared.append(block.__block__)
+
+            if value:
+                blocks[block.__block__] = value
+
+        logger.debug(
+            'Environment rendered',
+            environment=environment.name,
+            overlays=[str(path) for path in environment.overlays],
+            converted=len(self.models) - len(shared),
+            shared=len(shared),
+        )
+        return RenderedEnvironment(environment, data, blocks, shared)
+
+    def render_all(self, environments: Iterable[Environment]) -> Dict[str, RenderedEnvironment]:
+        return {environment.name: self.render(environment) for environment in environments}
+
+
+def resolve_data(value: Any, developer_mode: bool) -> Any:
+    """ Raw configuration with every `type; value; development value` reduced to `type; <value of the mode>`. """
+    if isinstance(value, dict):
+        return {key: resolve_data(item, developer_mode) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_data(item, developer_mode) for item in value]
+    if isinstance(value, str) and ';' in value:
+        type_name, selected = parse_metadata(value, developer_mode)
+        return f"{type_name.strip()}; {selected}"
+    return value
+
+
+def write_tree(rendered: RenderedEnvironment, output: Path, backend: Optional[YamlBackend] = None) -> Path:
+    """
+    Writes the resolved configuration of an environment to `<output>/<name>/settings.yml`: every value is the one
+    selected by the environment's `developer_mode`, so the folder gives the same configuration as `configs_path`
+    of a project in either mode. Unchanged files are not rewritten.
+    """
+    from confhub.utils.files import write_text_atomic
+
+    backend = backend or YamlBackend()
+    folder = Path(output) / rendered.environment.name
+    folder.mkdir(parents=True, exist_ok=True)
+
+    file_path = folder / 'settings.yml'
+    resolved = resolve_data(rendered.data, rendered.environment.developer_mode)
+    if write_text_atomic(file_path, backend.dump(resolved, default_flow_style=False)):
+        logger.info("Create file", path=file_path)
+    return file_path
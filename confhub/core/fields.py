@@ -10,17 +10,19 @@ class ConfigurationField:
             secret: bool,
             filename: str,
             is_list: bool,
+            packed: bool = False,
     ) -> None:
         self.data_type = data_type
         self.secret = secret
         self.filename = filename
         self.is_list = is_list
+        self.packed = packed
 
     def __str__(self) -> str:
         return f"ConfigurationField: [{self.data_type}]"
 
     def __repr__(self) -> str:
-        return f"ConfigurationField: [{self.data_type}; secret={self.secret}; filename={self.filename}; is_list={self.is_list}]"
+        return f"ConfigurationField: [{self.data_type}; secret={self.secret}; filename={self.filename}; is_list={self.is_list}; packed={self.packed}]"
 
     def get_default_value(self) -> str:
         return f"{self.data_type.__name__}; {DataTypeMapping.get_default_value(self.data_type.__name__)}"
@@ -30,13 +32,18 @@ def field(
         data_type: Any,
         secret: bool = False,
         filename: str = None,
-        is_list: bool = False
+        is_list: bool = False,
+        packed: bool = False
 ) -> ConfigurationField:
+    """
+    `packed=True` stores an `is_list` field of `int` or `float` as a compact `array.array`.
+    """
     return ConfigurationField(
         data_type=data_type,
         secret=secret,
         filename=filename,
-        is_list=is_list
+        is_list=is_list,
+        packed=packed
     )
 
 
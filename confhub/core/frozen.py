@@ -0,0 +1,73 @@
+import array
+import dataclasses
+import threading
+from typing import Any, Dict, List, Tuple, Type, Iterable
+
+from confhub.core.block import BlockCore
+from confhub.core.fields import ConfigurationField
+
+_lock = threading.RLock()
+_frozen_blocks: Dict[Type[BlockCore], type] = {}
+_frozen_models: Dict[Tuple[Tuple[str, Type[BlockCore]], ...], type] = {}
+
+
+def block_attributes(block: Type[BlockCore]) -> List[str]:
+    return [
+        attr_name
+        for attr_name, attr_value in block.__dict__.items()
+        if isinstance(attr_value, (ConfigurationField, BlockCore))
+    ]
+
+
+def frozen_class(block: Type[BlockCore]) -> type:
+    """ Slotted, frozen dataclass mirroring the fields of `block`, generated once per class. """
+    frozen = _frozen_blocks.get(block)
+    if frozen is None:
+        with _lock:
+            frozen = _frozen_blocks.get(block)
+            if frozen is None:
+                frozen = dataclasses.make_dataclass(
+                    block.__name__,
+                    [(attr_name, Any) for attr_name in block_attributes(block)],
+                    frozen=True,
+                    slots=True,
+                )
+                frozen.__block__ = block.__block__
+                _frozen_blocks[block] = frozen
+    return frozen
+
+
+def freeze(value: Any) -> Any:
+    """ Converts loaded blocks to their frozen classes and lists and packed arrays to tuples, recursively. """
+    if isinstance(value, BlockCore):
+        frozen = frozen_class(value.__class__)
+        return frozen(*[freeze(getattr(value, attr_name, None)) for attr_name in frozen.__dataclass_fields__])
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, array.array):
+        return tuple(value)
+    return value
+
+
+def freeze_models(blocks: Iterable[Tuple[str, BlockCore]]) -> Any:
+    """
+    Builds an immutable `Data` instance from the loaded blocks.
+    The `Data` class is generated once per set of blocks and reused by later loads and reloads.
+    """
+    blocks = list(blocks)
+    key = tuple((block_name, value.__class__) for block_name, value in blocks)
+
+    models = _frozen_models.get(key)
+    if models is None:
+        with _lock:
+            models = _frozen_models.get(key)
+            if models is None:
+                models = dataclasses.make_dataclass(
+                    'Data',
+                    [(block_name, frozen_class(block)) for block_name, block in key],
+                    frozen=True,
+                    slots=True,
+                )
+                _frozen_models[key] = models
+
+    return models(*[freeze(value) for _, value in blocks])
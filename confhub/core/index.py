@@ -0,0 +1,210 @@
+import bisect
+import dataclasses
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Type
+
+import structlog
+
+from confhub.core.block import BlockCore
+from confhub.core.fields import ConfigurationField
+from confhub.core.types import convert_value, convert_values
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+ENV_PREFIX = "CONFHUB"
+SEPARATOR = "__"
+
+_MISSING = object()
+
+
+def block_items(value: Any) -> Optional[Iterable[Tuple[str, Any]]]:
+    """ Attributes of a loaded block (plain or frozen), None for leaf values. """
+    if isinstance(value, BlockCore):
+        return vars(value).items()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type) and hasattr(value, '__block__'):
+        return ((item.name, getattr(value, item.name)) for item in dataclasses.fields(value))
+    return None
+
+
+def flatten(path: str, value: Any, into: Dict[str, Any]) -> None:
+    """ Adds `value` at `path` and every attribute of a block below it as `path.attr`; lists are leaves. """
+    into[path] = value
+    items = block_items(value)
+    if items is not None:
+        for attr_name, attr_value in items:
+            flatten(f"{path}.{attr_name}", attr_value, into)
+
+
+def resolve_field(block: Type[BlockCore], attrs: List[str]) -> Optional[Tuple[ConfigurationField, List[str]]]:
+    """ Declared field at the attribute path `attrs` under the model `block`, and its keys in the raw configuration. """
+    keys: List[str] = []
+    for position, attr_name in enumerate(attrs):
+        attr_value = block.__dict__.get(attr_name)
+        last = position == len(attrs) - 1
+        if isinstance(attr_value, ConfigurationField):
+            keys.append(attr_name)
+            if last:
+                return attr_value, keys
+            if isinstance(attr_value.data_type, BlockCore) and not attr_value.is_list:
+                block = attr_value.data_type.__class__
+                continue
+            return None
+        if isinstance(attr_value, BlockCore) and not last:
+            # Nested blocks are stored under their own `__block__` name
+            keys.append(attr_value.__block__)
+            block = attr_value.__class__
+            continue
+        return None
+    return None
+
+
+def env_overrides(
+        models: Iterable[Type[BlockCore]],
+        environ: Optional[Mapping[str, str]] = None,
+        prefix: str = ENV_PREFIX,
+) -> Dict[str, Any]:
+    """
+    Reads `<PREFIX>__<BLOCK>__<FIELD>[__<FIELD>...]` variables into an overlay of the raw configuration:
+    `CONFHUB__POSTGRESQL__PORT=6000` becomes `{"postgresql": {"port": "int; 6000"}}`, the same value in both modes.
+    Values of list fields are comma-separated. Values are checked against the declared field types here, so that
+    a bad variable is reported by name; variables that do not name a value field are skipped with a warning.
+    """
+    environ = os.environ if environ is None else environ
+    blocks = {block.__block__: block for block in models if block.__block__}
+    start = f"{prefix}{SEPARATOR}"
+
+    overrides: Dict[str, Any] = {}
+    for name, raw in environ.items():
+        if not name.startswith(start):
+            continue
+
+        parts = name[len(start):].lower().split(SEPARATOR)
+        block = blocks.get(parts[0])
+        resolved = resolve_field(block, parts[1:]) if block is not None and len(parts) > 1 else None
+        if resolved is None or isinstance(resolved[0].data_type, BlockCore):
+            logger.warning('Environment override does not match a configuration field', variable=name)
+            continue
+
+        field, keys = resolved
+        type_name = field.data_type.__name__
+        items = [item.strip() for item in raw.split(',')] if field.is_list else [raw.strip()]
+        try:
+            if any(';' in item for item in items):
+                raise ValueError("values cannot contain `;`")
+            if field.is_list:
+                convert_values(type_name, items, field.packed)
+            else:
+                convert_value(type_name, items[0])
+        except ValueError as err:
+            raise ValueError(f"{name}: {err}") from err
+
+        node = overrides.setdefault(parts[0], {})
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = [f"{type_name}; {item}" for item in items] if field.is_list else f"{type_name}; {items[0]}"
+
+    return overrides
+
+
+def apply_overrides(data: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `data` with the `env_overrides` overlay merged in, without modifying it; unchanged subtrees are shared.
+    Blocks that are not configured in the files are left out, a partial block would not load.
+    """
+    from confhub.core.parsing import merge_overlay
+
+    if not overrides:
+        return data
+
+    configured = {block_name: value for block_name, value in overrides.items() if data.get(block_name)}
+    for block_name in overrides.keys() - configured.keys():
+        logger.warning('Environment overrides ignored, the block is not configured', block=block_name)
+    return merge_overlay(data, configured) if configured else data
+
+
+class ConfigIndex:
+    """
+    Flat `{"block.attr.attr": value}` view of the loaded configuration.
+
+    Lookups are a single dict access; prefix iteration bisects a sorted list of the paths.
+    Blocks are flattened when the index is built, or, for lazily loaded models, through `loader(block_name)`
+    on first use, so a lookup never converts more than the block it asks for.
+    """
+
+    def __init__(
+            self,
+            blocks: Iterable[str],
+            loader: Optional[Callable[[str], Any]] = None,
+    ) -> None:
+        self._values: Dict[str, Any] = {}
+        self._keys: Optional[List[str]] = []
+        self._blocks = list(blocks)
+        self._pending = set(self._blocks)
+        self._loader = loader
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, blocks: Iterable[Tuple[str, Any]]) -> 'ConfigIndex':
+        blocks = dict(blocks)
+        index = cls(blocks)
+        for block_name, value in blocks.items():
+            index._add(block_name, value)
+        return index
+
+    def __contains__(self, path: str) -> bool:
+        return self.get(path, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        self._load_all()
+        return len(self._values)
+
+    def _add(self, block_name: str, value: Any) -> None:
+        values: Dict[str, Any] = {}
+        if value is not None:
+            flatten(block_name, value, values)
+
+        with self._lock:
+            self._values.update(values)
+            self._pending.discard(block_name)
+            self._keys = None
+
+    def _load(self, block_name: str) -> None:
+        if block_name in self._pending and self._loader is not None:
+            self._add(block_name, self._loader(block_name))
+
+    def _load_all(self) -> None:
+        for block_name in list(self._pending):
+            self._load(block_name)
+
+    def get(self, path: str, default: Any = None) -> Any:
+        value = self._values.get(path, _MISSING)
+        if value is _MISSING and self._pending:
+            self._load(path.split('.', 1)[0])
+            value = self._values.get(path, _MISSING)
+        return default if value is _MISSING else value
+
+    def items(self, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+        """ `(path, value)` pairs under `prefix` (a block or attribute path; '' for everything) in path order. """
+        if prefix:
+            self._load(prefix.split('.', 1)[0])
+        else:
+            self._load_all()
+
+        with self._lock:
+            if self._keys is None:
+                self._keys = sorted(self._values)
+            keys, values = self._keys, self._values
+
+        if not prefix:
+            yield from ((key, values[key]) for key in keys)
+            return
+
+        if prefix in values:
+            yield prefix, values[prefix]
+        start = f"{prefix}."
+        for position in range(bisect.bisect_left(keys, start), len(keys)):
+            key = keys[position]
+            if not key.startswith(start):
+                break
+            yield key, values[key]
@@ -0,0 +1,110 @@
+import abc
+import copy
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+from confhub.core.block import BlockCore
+
+
+class PendingBlock(abc.ABC):
+    """ Block that is already converted elsewhere and only has to be loaded, e.g. from a shared snapshot. """
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def load(self) -> BlockCore:
+        """ Returns the converted block. """
+
+
+class LazyModels:
+    """
+    Models object whose blocks are parsed and converted on first attribute access and then memoized.
+
+    Accessing a block that is not configured raises AttributeError, as with the eagerly built `Data` class.
+    `validate()` converts every pending block at once and reports all errors together.
+    """
+
+    def __init__(
+            self,
+            blocks: Iterable[Type[BlockCore]],
+            data: Dict[str, Any],
+            development_mode: bool,
+            wrap: Optional[Callable[[BlockCore], Any]] = None,
+    ) -> None:
+        self._blocks: Dict[str, Type[BlockCore]] = {block.__block__: block for block in blocks}
+        self._raw: Dict[str, Any] = {name: data.get(name) for name in self._blocks}
+        self._missing: set = set()
+        self._development_mode = development_mode
+        self._wrap = wrap
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_') or name not in self._blocks:
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
+
+        with self._lock:
+            if name not in self.__dict__ and name not in self._missing:
+                self._materialize(name)
+
+        if name in self._missing:
+            raise AttributeError(f"Block `{name}` is not configured")
+        return self.__dict__[name]
+
+    def __dir__(self) -> List[str]:
+        return sorted(set(super().__dir__()) | set(self._blocks))
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} loaded={self.loaded} pending={sorted(self._raw)}>"
+
+    @property
+    def loaded(self) -> List[str]:
+        return [name for name in self._blocks if name in self.__dict__]
+
+    def _materialize(self, name: str) -> None:
+        raw = self._raw.get(name)
+        if isinstance(raw, PendingBlock):
+            value = raw.load()
+        else:
+            value = self._blocks[name].from_dict(raw, development_mode=self._development_mode)
+        if value:
+            self.__dict__[name] = self._wrap(value) if self._wrap else value
+        else:
+            self._missing.add(name)
+        self._raw.pop(name, None)
+
+    def validate(self) -> 'LazyModels':
+        """ Converts all pending blocks, raising a ValueError listing every block that failed. """
+        errors = []
+        with self._lock:
+            for name in list(self._raw):
+                try:
+                    self._materialize(name)
+                except (ValueError, TypeError, AttributeError) as err:
+                    errors.append(f"{name}: {err}")
+
+        if errors:
+            raise ValueError("Configuration is invalid:\n" + "\n".join(errors))
+        return self
+
+    def detach(self, names: Iterable[str]) -> None:
+        """ Copies the pending data of `names`, so later in-place changes of the merged data do not leak in. """
+        with self._lock:
+            for name in set(names):
+                if name in self._raw and not isinstance(self._raw[name], PendingBlock):
+                    self._raw[name] = copy.deepcopy(self._raw[name])
+
+    def replace(self, data: Dict[str, Any]) -> 'LazyModels':
+        """ New models object with the blocks in `data` reset to pending, sharing every other block. """
+        models = self.__class__(self._blocks.values(), {}, self._development_mode, self._wrap)
+        with self._lock:
+            for name in self._blocks:
+                if name in data:
+                    models._raw[name] = data[name]
+                elif name in self.__dict__:
+                    models.__dict__[name] = self.__dict__[name]
+                    models._raw.pop(name)
+                elif name in self._missing:
+                    models._missing.add(name)
+                    models._raw.pop(name)
+                else:
+                    models._raw[name] = self._raw[name]
+        return models
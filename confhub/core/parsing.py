@@ -1,10 +1,63 @@
+import contextlib
+import fnmatch
+import functools
+from array import array
 import sys
-from typing import Union, Any, Dict, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Any, Dict, List, Optional, IO, Callable, Tuple, Set, Iterable, TYPE_CHECKING
 
 import yaml
+import structlog
 from pathlib import Path
 
-from confhub.core.types import convert_value
+from confhub.core.types import convert_value, convert_values
+
+if TYPE_CHECKING:
+    from confhub.core.report import LoadPhase
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+LIBYAML_AVAILABLE: bool = hasattr(yaml, 'CSafeLoader') and hasattr(yaml, 'CSafeDumper')
+
+
+class YamlBackend:
+    """
+    Loader/dumper pair used to read and write configuration files.
+
+    `libyaml` uses the C-backed `CSafeLoader`/`CSafeDumper` shipped with PyYAML,
+    `python` uses the pure-Python `SafeLoader`/`SafeDumper`,
+    `auto` picks `libyaml` when PyYAML was built with it and `python` otherwise.
+    """
+    AUTO = 'auto'
+    LIBYAML = 'libyaml'
+    PYTHON = 'python'
+
+    def __init__(self, name: Optional[str] = None) -> None:
+        name = (name or self.AUTO).lower()
+        if name not in (self.AUTO, self.LIBYAML, self.PYTHON):
+            raise ValueError(f"Unknown yaml backend: {name}")
+
+        if name == self.LIBYAML and not LIBYAML_AVAILABLE:
+            logger.warning("LibYAML is not available, falling back to the pure-Python yaml backend")
+            name = self.PYTHON
+        elif name == self.AUTO:
+            name = self.LIBYAML if LIBYAML_AVAILABLE else self.PYTHON
+
+        self.name = name
+        if name == self.LIBYAML:
+            self.loader, self.dumper = yaml.CSafeLoader, yaml.CSafeDumper
+        else:
+            self.loader, self.dumper = yaml.SafeLoader, yaml.SafeDumper
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name}>"
+
+    def load(self, stream: str | bytes | IO) -> Any:
+        return yaml.load(stream, Loader=self.loader)
+
+    def dump(self, data: Any, stream: Optional[IO] = None, **kwargs) -> Optional[str]:
+        return yaml.dump(data, stream, Dumper=self.dumper, **kwargs)
 
 
 def merge_dicts(base_dict, new_dict):
@@ -19,24 +72,290 @@ def merge_dicts(base_dict, new_dict):
     return base_dict
 
 
+def merge_overlay(base_dict: Dict[str, Any], new_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Same result as `merge_dicts(base_dict, new_dict)`, but `base_dict` is left untouched: only the mappings
+    along the key paths of `new_dict` are copied, every other subtree is shared with `base_dict`.
+    """
+    merged = dict(base_dict)
+    for key, value in new_dict.items():
+        current = merged.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            merged[key] = merge_overlay(current, value)
+        else:
+            merged[key] = value
+    return merged
+
+
+KeyPath = Tuple[str, ...]
+
+
+class LayeredMerge:
+    """
+    Merge of several parsed files that remembers which file every key path comes from.
+
+    Files are layered in the order they were added; a later file overrides the values of an earlier one
+    with the same semantics as `merge_dicts`. `set` and `remove` update `data` in place and cost time
+    proportional to the keys of the changed file, not to the size of the whole configuration.
+    Both return the key paths that were touched.
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {}
+        self.documents: Dict[Path, Dict[str, Any]] = {}
+        self.order: List[Path] = []
+        self.sources: Dict[KeyPath, Set[Path]] = {}
+        self._rank: Dict[Path, int] = {}
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} files={len(self.order)} keys={len(self.sources)}>"
+
+    @staticmethod
+    def key_paths(document: Dict[str, Any], prefix: KeyPath = ()) -> List[KeyPath]:
+        paths = []
+        for key, value in document.items():
+            path = prefix + (key,)
+            paths.append(path)
+            if isinstance(value, dict):
+                paths.extend(LayeredMerge.key_paths(value, path))
+        return paths
+
+    @staticmethod
+    def merge_values(values: List[Any]) -> Any:
+        """ Folds the values of one key path, ordered from the lowest layer to the highest. """
+        last_leaf = max((index for index, value in enumerate(values) if not isinstance(value, dict)), default=-1)
+        if last_leaf == len(values) - 1:
+            return values[-1]
+
+        layers = values[last_leaf + 1:]
+        keys = dict.fromkeys(key for layer in layers for key in layer)
+        return {key: LayeredMerge.merge_values([layer[key] for layer in layers if key in layer]) for key in keys}
+
+    def value(self, file: Path, path: KeyPath) -> Any:
+        node = self.documents[file]
+        for key in path:
+            node = node[key]
+        return node
+
+    def contributors(self, path: KeyPath) -> List[Path]:
+        return sorted(self.sources.get(path, ()), key=self._rank.__getitem__)
+
+    def _highest(self, files: Iterable[Optional[Path]]) -> Optional[Path]:
+        return max((file for file in files if file is not None), key=self._rank.__getitem__, default=None)
+
+    def _last_leaf(self, path: KeyPath) -> Optional[Path]:
+        """ Highest layer that sets `path` to a non-dict value. """
+        return self._highest(file for file in self.sources.get(path, ()) if not isinstance(self.value(file, path), dict))
+
+    def _barrier(self, path: KeyPath) -> Optional[Path]:
+        """ Highest layer that replaced `path` or one of its ancestors with a non-dict value. """
+        return self._highest(self._last_leaf(path[:depth]) for depth in range(1, len(path) + 1))
+
+    def visible(self, path: KeyPath) -> List[Path]:
+        barrier = self._barrier(path[:-1])
+        cut = self._rank[barrier] if barrier is not None else -1
+        return [file for file in self.contributors(path) if self._rank[file] > cut]
+
+    def owner(self, path: str | KeyPath) -> Optional[Path]:
+        """ File the merged value of `path` comes from (the highest layer defining it). """
+        path = tuple(path.split('.')) if isinstance(path, str) else tuple(path)
+        visible = self.visible(path)
+        return visible[-1] if visible else None
+
+    def shadowed(self, path: str | KeyPath) -> List[Path]:
+        """ Files that define `path` but whose values are overridden by a higher layer. """
+        path = tuple(path.split('.')) if isinstance(path, str) else tuple(path)
+        visible = self.visible(path)
+        if visible and isinstance(self.value(visible[-1], path), dict):
+            last_leaf = self._last_leaf(path)
+            cut = self._rank[last_leaf] if last_leaf is not None else -1
+            merged = {file for file in visible if self._rank[file] > cut}
+        else:
+            merged = set(visible[-1:])
+        return [file for file in self.contributors(path) if file not in merged]
+
+    def set(self, file: str | Path, document: Any) -> Set[KeyPath]:
+        """ Adds the parsed `document` of `file` as the highest layer, or replaces it in place. """
+        file = Path(file)
+        document = document if isinstance(document, dict) else {}
+
+        old_paths = self.key_paths(self.documents[file]) if file in self.documents else []
+        new_paths = self.key_paths(document)
+        touched = set(old_paths) | set(new_paths)
+        before = {path: self._barrier(path) for path in touched}
+
+        if file not in self._rank:
+            self._rank[file] = len(self.order)
+            self.order.append(file)
+
+        self._unindex(file, old_paths)
+        self.documents[file] = document
+        for path in new_paths:
+            self.sources.setdefault(path, set()).add(file)
+
+        self._apply(touched, before)
+        return touched
+
+    def remove(self, file: str | Path) -> Set[KeyPath]:
+        file = Path(file)
+        if file not in self.documents:
+            return set()
+
+        touched = set(self.key_paths(self.documents[file]))
+        before = {path: self._barrier(path) for path in touched}
+
+        self._unindex(file, touched)
+        del self.documents[file]
+        self.order.remove(file)
+        self._rank = {path: rank for rank, path in enumerate(self.order)}
+
+        self._apply(touched, before)
+        return touched
+
+    def reorder(self, files: Iterable[str | Path]) -> Set[KeyPath]:
+        """ Changes the layer order of the known files, rebuilding `data` if it actually changed. """
+        order = [Path(file) for file in files if Path(file) in self.documents]
+        order += [file for file in self.order if file not in order]
+        if order == self.order:
+            return set()
+
+        self.order = order
+        self._rank = {path: rank for rank, path in enumerate(order)}
+        self.data.clear()
+        self.data.update(self.merge_values([{}] + [self.documents[file] for file in order]))
+        return set(self.sources)
+
+    def _unindex(self, file: Path, paths: Iterable[KeyPath]) -> None:
+        for path in paths:
+            sources = self.sources.get(path)
+            if sources is not None:
+                sources.discard(file)
+                if not sources:
+                    del self.sources[path]
+
+    def _apply(self, touched: Set[KeyPath], before: Dict[KeyPath, Optional[Path]]) -> None:
+        replaced: Set[KeyPath] = set()
+        for path in sorted(touched, key=len):
+            if any(path[:depth] in replaced for depth in range(1, len(path))):
+                continue
+
+            parent = self.data
+            for key in path[:-1]:
+                parent = parent[key]
+
+            visible = self.visible(path)
+            if not visible:
+                parent.pop(path[-1], None)
+                replaced.add(path)
+                continue
+
+            values = [self.value(file, path) for file in visible]
+            if not isinstance(values[-1], dict):
+                parent[path[-1]] = values[-1]
+                replaced.add(path)
+            elif (
+                    not isinstance(parent.get(path[-1]), dict)
+                    or self._barrier(path) != before[path]
+            ):
+                # The set of layers visible under this key changed, so keys of untouched files may appear
+                parent[path[-1]] = self.merge_values(values)
+                replaced.add(path)
+
+
 class YamlFileMerger:
-    def __init__(self, *paths: str | Path):
+    """
+    Reads YAML files and merges them in the order they were passed.
+
+    When the total size of the files reaches `parallel_threshold` bytes, the files are read and parsed
+    concurrently in a thread pool; the results are still merged in the original order.
+    `parallel_threshold=None` always reads the files one after another.
+    With `keep_documents=True` the parsed content of every file is kept untouched in `documents`
+    and the files are merged through a `LayeredMerge` (`layers`), so they can later be replaced one by one.
+    With `report` (a `confhub.core.report.LoadPhase`) every file adds a `parse` and a `merge` child phase.
+    Files that cannot be read or parsed are skipped; their errors are kept in `errors`.
+    """
+    PARALLEL_THRESHOLD: int = 256 * 1024
+
+    def __init__(
+            self,
+            *paths: str | Path,
+            backend: Optional[YamlBackend] = None,
+            parallel_threshold: Optional[int] = PARALLEL_THRESHOLD,
+            max_workers: Optional[int] = None,
+            keep_documents: bool = False,
+            report: Optional['LoadPhase'] = None,
+    ):
         self.paths = [Path(path) for path in paths]
+        self.backend = backend or YamlBackend()
+        self.parallel_threshold = parallel_threshold
+        self.max_workers = max_workers
+        self.keep_documents = keep_documents
+        self.report = report
+        self.documents: Dict[Path, Any] = {}
+        self.errors: Dict[Path, Exception] = {}
+        self.layers: Optional[LayeredMerge] = LayeredMerge() if keep_documents else None
         self.data = self.merge_files()
 
+    def load_file(self, file_path: Path) -> Any:
+        with open(file_path, 'r') as file:
+            return self.backend.load(file)
+
+    def load_file_reported(self, file_path: Path) -> Any:
+        allocated_blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return self.load_file(file_path)
+        finally:
+            self.report.record(
+                'parse', time.perf_counter() - start, sys.getallocatedblocks() - allocated_blocks, file=str(file_path)
+            )
+
+    def use_pool(self) -> bool:
+        if self.parallel_threshold is None or len(self.paths) < 2:
+            return False
+
+        total_size = 0
+        for file_path in self.paths:
+            try:
+                total_size += file_path.stat().st_size
+            except OSError:
+                continue
+
+        return total_size >= self.parallel_threshold
+
     def merge_files(self):
+        load_file = self.load_file if self.report is None else self.load_file_reported
+        if not self.use_pool():
+            return self.merge_loaded([functools.partial(load_file, file_path) for file_path in self.paths])
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or min(32, len(self.paths))) as pool:
+            futures = [pool.submit(load_file, file_path) for file_path in self.paths]
+            return self.merge_loaded([future.result for future in futures])
+
+    def merge_loaded(self, loaders: List[Callable[[], Any]]) -> Dict[str, Any]:
         merged_data = {}
-        for file_path in self.paths:
+        for file_path, load in zip(self.paths, loaders):
             try:
-                with open(file_path, 'r') as file:
-                    data = yaml.safe_load(file)
-                    merged_data = merge_dicts(merged_data, data)
-            except FileNotFoundError:
+                data = load()
+                with self.report.phase('merge', file=str(file_path)) if self.report else contextlib.nullcontext():
+                    if self.layers is not None:
+                        self.documents[file_path] = data
+                        self.layers.set(file_path, data)
+                    else:
+                        merged_data = merge_dicts(merged_data, data)
+            except FileNotFoundError as e:
+                self.errors[file_path] = e
                 print(f"File not found: {file_path}")
             except yaml.YAMLError as e:
+                self.errors[file_path] = e
                 print(f"Error parsing YAML from {file_path}: {e}")
 
-        return merged_data
+        return self.layers.data if self.layers is not None else merged_data
+
+
+def config_files(config_path: Path) -> List[Path]:
+    """ Configuration files of the `configs_path` folder; `example__*` files are skipped. """
+    return [file for file in Path(config_path).glob('*') if not fnmatch.fnmatch(file.name, 'example__*')]
 
 
 def get_service_data() -> Dict[str, Any]:
@@ -45,16 +364,54 @@ def get_service_data() -> Dict[str, Any]:
     return yml_data.data
 
 
-def parsing_value(value: str, development_mode: bool) -> Union[str, int, float, bool, list]:
-    if isinstance(value, List):
-        return [parsing_value(_value, development_mode) for _value in value]
-    else:
-        metadata = value.split(';')
+def parsing_list(values: list, development_mode: bool, packed: bool = False) -> Union[list, array]:
+    """
+    Parses a list whose items share one type prefix in a single batch: the prefix is taken once and the
+    values are converted together (see `convert_values`). Anything else is parsed item by item.
+    """
+    if not values or not isinstance(values[0], str):
+        return [parsing_value(_value, development_mode) for _value in values]
+
+    type_value = values[0].partition(';')[0]
+    raw_values = []
+    for item in values:
+        if not isinstance(item, str):
+            return [parsing_value(_value, development_mode) for _value in values]
+
+        prefix, separator, rest = item.partition(';')
+        if prefix != type_value or not separator:
+            return [parsing_value(_value, development_mode) for _value in values]
+        raw_values.append(rest)
+
+    if any(';' in rest for rest in raw_values):
+        selected = []
+        for rest in raw_values:
+            value, *development_value = rest.split(';')
+            selected.append(development_value[0] if development_value and development_value[0] and development_mode else value)
+        raw_values = selected
 
-        if len(metadata) < 2:
-            raise ValueError("Value metadata contains little or no data")
+    return convert_values(type_value, raw_values, packed=packed)
 
-        type_value, value, *development_value = metadata + [None] * (3 - len(metadata))
-        development_value = development_value[0] if development_value else None
 
-        return convert_value(type_value, development_value.strip() if development_value and development_mode else value.strip())
+METADATA_CACHE_SIZE: int = 4096
+
+
+@functools.lru_cache(maxsize=METADATA_CACHE_SIZE)
+def parse_metadata(value: str, development_mode: bool) -> Tuple[str, str]:
+    """ Splits `type; value; development value` into the type name and the value to use (memoized). """
+    metadata = value.split(';')
+
+    if len(metadata) < 2:
+        raise ValueError("Value metadata contains little or no data")
+
+    type_value, value, *development_value = metadata + [None] * (3 - len(metadata))
+    development_value = development_value[0] if development_value else None
+
+    return type_value, development_value.strip() if development_value and development_mode else value.strip()
+
+
+def parsing_value(value: str, development_mode: bool) -> Any:
+    if isinstance(value, List):
+        return parsing_list(value, development_mode)
+    else:
+        return convert_value(*parse_metadata(value, bool(development_mode)))
@@ -0,0 +1,89 @@
+import contextlib
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+
+
+@dataclass
+class LoadPhase:
+    """
+    Timing of one step of loading the configuration.
+    Attributes:
+    name (str): Phase name, e.g. `models_import`, `parse` or `convert`.
+    seconds (float): Wall time of the phase.
+    allocated_blocks (int): Net change of the number of memory blocks allocated by the interpreter.
+    info (Dict[str, Any]): Details such as the file or block the phase is about.
+    children (List[LoadPhase]): Nested phases (per file, per block).
+    """
+    name: str
+    seconds: float = 0.0
+    allocated_blocks: int = 0
+    info: Dict[str, Any] = field(default_factory=dict)
+    children: List['LoadPhase'] = field(default_factory=list)
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **info) -> Iterator['LoadPhase']:
+        """ Measures the enclosed code as a child phase. """
+        phase = LoadPhase(name=name, info=info)
+        self.children.append(phase)
+
+        allocated_blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield phase
+        finally:
+            phase.seconds = time.perf_counter() - start
+            phase.allocated_blocks = sys.getallocatedblocks() - allocated_blocks
+
+    def record(self, name: str, seconds: float, allocated_blocks: int = 0, **info) -> 'LoadPhase':
+        """ Adds a child phase measured elsewhere, e.g. in a worker thread. """
+        phase = LoadPhase(name=name, seconds=seconds, allocated_blocks=allocated_blocks, info=info)
+        self.children.append(phase)
+        return phase
+
+    def find(self, name: str) -> List['LoadPhase']:
+        """ All phases called `name` in this subtree. """
+        found = [self] if self.name == name else []
+        for child in self.children:
+            found.extend(child.find(name))
+        return found
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            'name': self.name,
+            'seconds': round(self.seconds, 6),
+            'allocated_blocks': self.allocated_blocks,
+            **self.info,
+        }
+        if self.children:
+            data['children'] = [child.to_dict() for child in self.children]
+        return data
+
+
+class LoadReport(LoadPhase):
+    """
+    Structured report of a `Confhub` load: wall time and allocations per phase and per file/block.
+    The report itself is the root phase; its `seconds` is the total load time.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(name='load')
+        self._started = time.perf_counter()
+        self._allocated_blocks = sys.getallocatedblocks()
+
+    def finish(self) -> 'LoadReport':
+        self.seconds = time.perf_counter() - self._started
+        self.allocated_blocks = sys.getallocatedblocks() - self._allocated_blocks
+        return self
+
+    def log(self, log: Optional[structlog.BoundLogger] = None) -> None:
+        """ Hook for `Confhub(report_hook=LoadReport.log)`: emits the report through the confhub structlog logger. """
+        (log or structlog.get_logger("confhub")).info(
+            'Configuration load report',
+            seconds=round(self.seconds, 6),
+            allocated_blocks=self.allocated_blocks,
+            phases=[child.to_dict() for child in self.children],
+        )
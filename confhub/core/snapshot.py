@@ -0,0 +1,124 @@
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+
+from confhub.core.block import BlockCore
+from confhub.core.lazy import PendingBlock
+from confhub.utils.files import owned_by_user
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+
+class SnapshotBlock(PendingBlock):
+    """ Block pickled inside a snapshot; unpickled from the mapped pages on first access. """
+    __slots__ = ('snapshot', 'offset', 'length')
+
+    def __init__(self, snapshot: 'SharedSnapshot', offset: int, length: int) -> None:
+        self.snapshot = snapshot
+        self.offset = offset
+        self.length = length
+
+    def load(self) -> BlockCore:
+        return pickle.loads(self.snapshot.buffer[self.offset:self.offset + self.length])
+
+
+class SharedSnapshot:
+    """
+    Memory-mapped snapshot of the converted blocks, shared by the processes of a pre-fork worker pool.
+
+    Layout: magic, header length, pickled header `(key, [(block_name, offset, length), ...])`
+    followed by one pickle per block. Readers map the file and unpickle a block only when it is
+    first accessed, so a worker touches only the pages of the blocks it uses and the page cache
+    is shared by every process. Put the file on a RAM-backed filesystem (`/dev/shm`) to avoid disk I/O.
+    """
+    MAGIC = b"CONFHUB\x01"
+    HEADER = struct.Struct("<8sQ")
+
+    def __init__(self, path: str | Path, key: str, blocks: List[Tuple[str, int, int]], buffer: mmap.mmap) -> None:
+        self.path = Path(path)
+        self.key = key
+        self.blocks = blocks
+        self.buffer = buffer
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path} blocks={len(self.blocks)}>"
+
+    @classmethod
+    def publish(cls, path: str | Path, key: str, blocks: List[Tuple[str, BlockCore]]) -> None:
+        """
+        Atomically writes `blocks` to `path`; processes attached to an older snapshot keep their mapping.
+        A snapshot that cannot be written is logged and skipped, the configuration is still loaded.
+        """
+        payloads = [(block_name, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for block_name, value in blocks]
+
+        index, offset = [], 0
+        for block_name, payload in payloads:
+            index.append((block_name, offset, len(payload)))
+            offset += len(payload)
+        header = pickle.dumps((key, index), protocol=pickle.HIGHEST_PROTOCOL)
+
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(cls.HEADER.pack(cls.MAGIC, len(header)))
+                    file.write(header)
+                    for _, payload in payloads:
+                        file.write(payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as err:
+            logger.warning("Failed to write configuration snapshot", path=path, err=err)
+            return
+
+        logger.debug("Configuration snapshot published", path=path, size=cls.HEADER.size + len(header) + offset)
+
+    @classmethod
+    def attach(cls, path: str | Path, key: Optional[str] = None) -> Optional['SharedSnapshot']:
+        """
+        Maps the snapshot at `path`. Returns None if it is missing, unreadable, was built for another `key`
+        or is not owned by the current user (snapshots often live in a shared directory such as `/dev/shm`).
+        """
+        try:
+            with open(path, 'rb') as file:
+                if not owned_by_user(os.fstat(file.fileno())):
+                    logger.warning("Configuration snapshot is not owned by the current user, ignored", path=path)
+                    return None
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as err:
+            logger.warning("Failed to read configuration snapshot", path=path, err=err)
+            return None
+
+        try:
+            magic, header_length = cls.HEADER.unpack_from(buffer, 0)
+            if magic != cls.MAGIC:
+                raise ValueError("Not a confhub snapshot")
+            snapshot_key, index = pickle.loads(buffer[cls.HEADER.size:cls.HEADER.size + header_length])
+        except Exception as err:
+            logger.debug("Configuration snapshot is unreadable", path=path, err=err)
+            buffer.close()
+            return None
+
+        if key is not None and snapshot_key != key:
+            logger.debug("Configuration snapshot is outdated", path=path)
+            buffer.close()
+            return None
+
+        start = cls.HEADER.size + header_length
+        return cls(path, snapshot_key, [(block_name, start + offset, length) for block_name, offset, length in index], buffer)
+
+    def pending(self) -> Dict[str, Any]:
+        """ Block name -> `SnapshotBlock`, ready to be passed to `LazyModels`. """
+        return {block_name: SnapshotBlock(self, offset, length) for block_name, offset, length in self.blocks}
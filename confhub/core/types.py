@@ -1,40 +1,180 @@
-from typing import Type, Union
+import re
+from array import array
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from typing import Type, Union, List, Any, Callable, Dict, Optional, Iterable, Tuple, NamedTuple
 
 
-MAPPING = {
-    "str": (str, "VALUE"),
-    "int": (int, "1234"),
-    "float": (float, "1234.101"),
-    "bool": (bool, "true")
+class ByteSize(int):
+    """ Number of bytes, written in configurations as `512`, `10KB`, `1.5MiB`, ... """
+
+
+class DataType(NamedTuple):
+    """
+    Type that can be used in configuration values (`<name>; <value>`).
+    Attributes:
+    name (str): Type name written in configurations.
+    python_type (Type): Type of the converted values.
+    default (str): Value written by `generate_models`.
+    converter (Callable[[str], Any]): Converts a stripped string value, raising ValueError/TypeError/ArithmeticError.
+    typecode (Optional[str]): `array.array` typecode used for packed lists of this type.
+    """
+    name: str
+    python_type: Type
+    default: str
+    converter: Callable[[str], Any]
+    typecode: Optional[str] = None
+
+
+class TypeRegistry:
+    """ Registry of the data types known to configurations. """
+
+    def __init__(self) -> None:
+        self.types: Dict[str, DataType] = {}
+
+    def __contains__(self, type_name: str) -> bool:
+        return type_name in self.types
+
+    def register(
+            self,
+            name: str,
+            converter: Callable[[str], Any],
+            default: str,
+            python_type: Optional[Type] = None,
+            typecode: Optional[str] = None,
+            aliases: Iterable[str] = (),
+    ) -> DataType:
+        """
+        Registers a data type under `name`, the `__name__` of `python_type` and `aliases`.
+        Models reference it with `field(python_type)`, configurations with `<name>; <value>`.
+        """
+        data_type = DataType(
+            name=name,
+            python_type=python_type or converter,
+            default=default,
+            converter=converter,
+            typecode=typecode,
+        )
+        names = {name, *aliases}
+        if python_type is not None:
+            names.add(python_type.__name__)
+
+        for type_name in names:
+            self.types[type_name] = data_type
+            MAPPING[type_name] = (data_type.python_type, default)
+        return data_type
+
+    def get(self, type_name: str) -> DataType:
+        data_type = self.types.get(type_name)
+        if data_type is None:
+            raise ValueError(f"Unknown data type: {type_name}")
+        return data_type
+
+
+def parse_bool(value: str) -> bool:
+    return BOOLEANS[value.lower()]
+
+
+def parse_duration(value: str) -> timedelta:
+    """ `90`, `1.5h`, `1h30m`, `250ms`, ... A bare number is a number of seconds. """
+    try:
+        return timedelta(seconds=float(value))
+    except ValueError:
+        pass
+
+    if not DURATION_PATTERN.fullmatch(value):
+        raise ValueError(value)
+
+    duration = timedelta()
+    for amount, unit in DURATION_PART.findall(value):
+        duration += timedelta(**{DURATION_UNITS[unit]: float(amount)})
+    return duration
+
+
+def parse_byte_size(value: str) -> ByteSize:
+    """ `512`, `10KB`, `1.5MiB`, ... Decimal units are powers of 1000, binary (`KiB`, ...) of 1024. """
+    match = BYTE_SIZE_PATTERN.fullmatch(value)
+    if not match:
+        raise ValueError(value)
+
+    amount, unit = match.groups()
+    size = Decimal(amount) * BYTE_UNITS[unit.lower()]
+    if size != size.to_integral_value():
+        raise ValueError(value)
+    return ByteSize(size)
+
+
+BOOLEANS = {"true": True, "false": False}
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(ms|us|µs|d|h|m|s)")
+DURATION_PATTERN = re.compile(r"(?:\s*\d+(?:\.\d+)?\s*(?:ms|us|µs|d|h|m|s))+\s*")
+DURATION_UNITS = {"d": "days", "h": "hours", "m": "minutes", "s": "seconds", "ms": "milliseconds", "us": "microseconds", "µs": "microseconds"}
+
+BYTE_SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*([kmgtp]i?b|b|)", re.IGNORECASE)
+BYTE_UNITS = {
+    "": 1, "b": 1,
+    **{f"{prefix}b": 1000 ** power for power, prefix in enumerate("kmgtp", start=1)},
+    **{f"{prefix}ib": 1024 ** power for power, prefix in enumerate("kmgtp", start=1)},
 }
 
+MAPPING: Dict[str, Tuple[Type, str]] = {}
+
+TYPES = TypeRegistry()
+TYPES.register("str", str, "VALUE", python_type=str)
+TYPES.register("int", int, "1234", python_type=int, typecode="q")
+TYPES.register("float", float, "1234.101", python_type=float, typecode="d")
+TYPES.register("bool", parse_bool, "true", python_type=bool)
+TYPES.register("decimal", Decimal, "1234.10", python_type=Decimal)
+TYPES.register("datetime", datetime.fromisoformat, "2024-01-01T00:00:00", python_type=datetime)
+TYPES.register("date", date.fromisoformat, "2024-01-01", python_type=date)
+TYPES.register("duration", parse_duration, "30s", python_type=timedelta)
+TYPES.register("bytesize", parse_byte_size, "1MiB", python_type=ByteSize)
+
+register_type = TYPES.register
+
 
 class DataTypeMapping:
     @classmethod
     def get_default_value(cls, type_name: str) -> str:
-        if type_name not in MAPPING:
-            raise ValueError(f"Unknown data type: {type_name}")
-
-        return MAPPING.get(type_name)[1]
+        return TYPES.get(type_name).default
 
     @classmethod
     def get_data_type(cls, type_name: str) -> Type:
-        if type_name not in MAPPING:
-            raise ValueError(f"Unknown data type: {type_name}")
+        return TYPES.get(type_name).python_type
+
+
+def convert_value(type_name: str, value: str) -> Any:
+    converter = TYPES.get(type_name).converter
+    try:
+        return converter(value)
+    except (ValueError, TypeError, ArithmeticError, KeyError):
+        raise ValueError(f"Cannot convert `{value}` to type {type_name}")
+
+
+def convert_values(type_name: str, values: List[str], packed: bool = False) -> Union[list, array]:
+    """
+    Converts a whole list of unstripped values of one type.
+    With `packed=True` types with an array typecode (int, float) are returned as `array.array`
+    (plain list if the values do not fit).
+    """
+    data_type = TYPES.get(type_name)
+    if data_type.converter is str:
+        return [value.strip() for value in values]
+    if data_type.typecode is None:
+        return [convert_value(type_name, value.strip()) for value in values]
+
+    if data_type.converter not in (int, float):
+        # int() and float() ignore surrounding whitespace themselves
+        values = [value.strip() for value in values]
 
-        return MAPPING.get(type_name)[0]
-
-
-def convert_value(type_name: str, value: str) -> Union[str, int, float, bool]:
-    if type_name == "bool":
-        if value.lower() == "true":
-            return True
-        elif value.lower() == "false":
-            return False
-        else:
-            raise ValueError(f"Cannot convert string '{value}' to bool")
-    else:
-        try:
-            return MAPPING.get(type_name)[0](value)
-        except ValueError:
-            raise ValueError(f"Cannot convert `{value}` to type {type_name}")
+    try:
+        if packed:
+            try:
+                return array(data_type.typecode, map(data_type.converter, values))
+            except OverflowError:
+                pass
+        return list(map(data_type.converter, values))
+    except (ValueError, TypeError):
+        for value in values:
+            convert_value(type_name, value.strip())
+        raise
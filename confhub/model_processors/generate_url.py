@@ -1,9 +1,15 @@
-import inspect
-from typing import Set
+import functools
+from typing import FrozenSet
 
-import yarl
 
-from confhub.core.error import ConfhubError
+@functools.lru_cache(maxsize=None)
+def url_build_parameters() -> FrozenSet[str]:
+    """ Parameter names of `yarl.URL.build`; yarl and inspect are imported on first use. """
+    import inspect
+
+    import yarl
+
+    return frozenset(inspect.signature(yarl.URL.build).parameters.keys())
 
 
 class URLBuilder:
@@ -23,9 +29,12 @@ class URLBuilder:
         Exceptions:
             ConfhubError: Occurs if there is an error creating the URL.
         """
+        import yarl
+
+        from confhub.core.error import ConfhubError
+
         # We get the signature of the yarl.URL.build method
-        build_signature: inspect.Signature = inspect.signature(yarl.URL.build)
-        valid_keys: Set[str] = set(build_signature.parameters.keys())
+        valid_keys: FrozenSet[str] = url_build_parameters()
 
         # Collecting parameters to create a URL
         params = {
@@ -1,23 +1,56 @@
+import asyncio
+import contextlib
 import dataclasses
-import fnmatch
+import copy
+import functools
+import inspect
+import json
+import threading
 from pathlib import Path
-from typing import Optional, Type, List
+from typing import Optional, Type, List, Tuple, Dict, Callable, Iterable, ContextManager, Any, Iterator
 
 import structlog
 
 from confhub import BlockCore
-from confhub.core.parsing import get_service_data, YamlFileMerger
-from confhub.setup_logger import SetupLogger, LoggerReg
+from confhub.core.cache import ConfigCache, fingerprint
+from confhub.core.daemon import DaemonClient, DaemonBlock, default_socket_path
+from confhub.core.frozen import freeze_models, freeze
+from confhub.core.index import ConfigIndex, apply_overrides, env_overrides, block_items, flatten, ENV_PREFIX
+from confhub.core.lazy import LazyModels
+from confhub.core.report import LoadReport, LoadPhase
+from confhub.core.snapshot import SharedSnapshot
+from confhub.core.parsing import get_service_data, YamlFileMerger, YamlBackend, LayeredMerge, config_files
+from confhub.setup_logger import DEFAULT_PROFILE, SetupLogger, LoggerReg
 from confhub.utils.__models import get_models_from_path
+from confhub.watcher import ConfigWatcher, ConfigChange
 
 logger: structlog.BoundLogger = structlog.get_logger("confhub")
 
+_MISSING = object()
+
+
+def _flat(value: Any) -> Dict[str, Any]:
+    """ Leaf values of a loaded block by attribute path, to compare two loads of it. """
+    into: Dict[str, Any] = {}
+    flatten('', value, into)
+    return {path: item for path, item in into.items() if block_items(item) is None}
+
 
 class Confhub:
     def __init__(
             self,
             developer_mode: bool = False,
             logger_regs: Optional[list[LoggerReg]] = None,
+            cache_path: Optional[str] = None,
+            watch: bool = False,
+            watch_debounce: float = 0.5,
+            compact: Optional[bool] = None,
+            lazy: Optional[bool] = None,
+            parallel_threshold: Optional[int] = None,
+            snapshot_path: Optional[str] = None,
+            report: bool = False,
+            report_hook: Optional[Callable[[LoadReport], None]] = None,
+            daemon: Optional[bool | str] = None,
     ) -> None:
         """
         Example:
@@ -29,8 +62,47 @@ class Confhub:
             data: type[dataclasses.dataclass] = Confhub(developer_mode=False).models
 
             print(data.postgresql.host)
+
+        If `cache_path` is passed (or `cache_path` is set in `.service.yml`), the merged and converted
+        configuration is stored there and reused on the next start until any source file changes.
+
+        With `watch=True` the configuration folder is watched in the background: changed files are re-parsed,
+        the affected blocks are rebuilt and a new `models` object replaces the old one. Use `subscribe`
+        to be notified about reloads and `close` to stop watching.
+
+        With `compact=True` (or `compact_models: True` in `.service.yml`) `models` is an immutable instance of
+        slotted, frozen classes generated once per model set; lists are stored as tuples.
+
+        With `lazy=True` (or `lazy: True` in `.service.yml`) each block is converted the first time it is
+        accessed on `models`; call `models.validate()` to convert everything and report all errors at once.
+        A lazily converted configuration is not written to the cache.
+
+        `parallel_threshold` overrides the value from `.service.yml`; 0 always reads the files concurrently.
+        In asyncio applications use `await Confhub.aload(...)`.
+
+        With `snapshot_path` (or `snapshot_path` in `.service.yml`) the first process to load the configuration
+        publishes the converted blocks to a memory-mapped snapshot file; later processes with unchanged sources
+        (e.g. the workers of a gunicorn/uvicorn pre-fork pool) attach to it and unpickle a block only when
+        it is first accessed, without parsing any YAML.
+
+        With `report=True` the load is measured phase by phase (reading `.service.yml`, importing the models,
+        globbing, parsing and merging every file, converting every block, building `models`) into `load_report`.
+        `report_hook` (e.g. `LoadReport.log`) is called with the finished report and implies `report=True`.
+
+        With `daemon=True` (or a socket path; `daemon_socket` in `.service.yml`) the blocks are fetched from
+        `confhub serve` one by one when first accessed instead of parsing the files; with `watch=True` the daemon
+        pushes changes. If the daemon is not running or goes away, the configuration is loaded directly.
+        `daemon=False` disables it regardless of `.service.yml`.
+
+        `get("postgresql.host")` and `items("postgresql")` read a flat index of dotted paths built at load time.
+        Environment variables such as `CONFHUB__POSTGRESQL__PORT=5433` (prefix `env_prefix` in `.service.yml`)
+        override single fields. They are merged into the raw configuration before conversion, so `models`,
+        `get` and `items` agree; `overrides` holds them as a raw overlay.
         """
-        service_data = get_service_data()
+        self.load_report: Optional[LoadReport] = LoadReport() if report or report_hook else None
+
+        with self.__phase('service_data'):
+            service_data = get_service_data()
         _config_path = service_data.get('configs_path')
         if not _config_path or not isinstance(_config_path, str):
             raise ValueError("Directory `config` not defined")
@@ -39,29 +111,411 @@ class Confhub:
         if self.developer_mode:
             logger.warning('Developer mode enabled for configuration')
 
-        SetupLogger(name_registration=logger_regs, developer_mode=developer_mode)
+        with self.__phase('logger'):
+            SetupLogger(
+                name_registration=logger_regs,
+                developer_mode=developer_mode,
+                profile=service_data.get('logging_profile') or DEFAULT_PROFILE,
+            )
+
+        with self.__phase('models_import', path=str(service_data.get('models_path'))):
+            models: List[BlockCore] = get_models_from_path(data=service_data)
+
+        self.config_path = Path(service_data.get('configs_path'))
+        with self.__phase('glob', path=str(self.config_path)):
+            filtered_config_list = self.__config_files()
 
-        models: List[BlockCore] = get_models_from_path(data=service_data)
+        self.yaml_backend = YamlBackend(service_data.get('yaml_backend'))
+        self.parallel_threshold = parallel_threshold if parallel_threshold is not None else service_data.get(
+            'parallel_threshold', YamlFileMerger.PARALLEL_THRESHOLD
+        )
+        self.compact = compact if compact is not None else bool(service_data.get('compact_models'))
+        self.lazy = lazy if lazy is not None else bool(service_data.get('lazy'))
 
-        config_path = Path(service_data.get('configs_path'))
-        config_list = list(config_path.glob('*'))
-        filtered_config_list = [file for file in config_list if not fnmatch.fnmatch(file.name, 'example__*')]
+        with self.__phase('env_overrides'):
+            self.overrides: Dict[str, Any] = env_overrides(models, prefix=service_data.get('env_prefix') or ENV_PREFIX)
+
+        cache_path = cache_path or service_data.get('cache_path')
+        self.__cache_sources = [Path.cwd() / '.service.yml', Path(service_data.get('models_path'))]
+        with self.__phase('fingerprint') if cache_path else contextlib.nullcontext():
+            self.cache = self.__make_cache(cache_path, filtered_config_list) if cache_path else None
+        self.snapshot_path = snapshot_path or service_data.get('snapshot_path')
+
+        daemon = daemon if daemon is not None else service_data.get('daemon_socket')
+        self.daemon_socket: Optional[Path] = (default_socket_path() if daemon is True else Path(daemon)) if daemon else None
+        self.daemon: Optional[DaemonClient] = None
+
+        self.__model_classes = models
+        self.__layers: Optional[LayeredMerge] = None
+        self.__blocks: Dict[str, BlockCore] = {}
+        self.__subscribers: List[Callable[[Type[dataclasses.dataclass], ConfigChange], None]] = []
+        self.__reload_lock = threading.Lock()
+        # Pending lazy blocks keep the merged tree alive anyway, the documents let reloads diff against it
+        self.__keep_documents = watch or self.lazy
+        self.__watch_debounce = watch_debounce
+        self.__direct_data: Optional[dict] = None
 
         self.models = self.__load(*models, files=filtered_config_list)
+        with self.__phase('index'):
+            self.index = self.__make_index(self.models)
+
+        if self.load_report:
+            self.load_report.finish()
+            if report_hook:
+                report_hook(self.load_report)
+
+        self.watcher: Optional[ConfigWatcher] = None
+        if watch and self.daemon:
+            self.daemon.subscribe(self.__daemon_changed, self.__daemon_lost)
+        elif watch:
+            self.watcher = ConfigWatcher(self.config_path, self.reload, debounce=watch_debounce).start()
+
+    @classmethod
+    async def aload(cls, *args, **kwargs) -> 'Confhub':
+        """
+        Builds `Confhub` without blocking the event loop: the whole constructor runs in the default executor.
+        Unless `parallel_threshold` is passed or set in `.service.yml`, it is 0 here, so the files are always
+        read concurrently. Takes the same arguments as the constructor.
+
+        Example:
+        config = await Confhub.aload(developer_mode=False)
+        print(config.models.postgresql.host)
+        """
+        def load() -> 'Confhub':
+            arguments = inspect.signature(cls).bind_partial(*args, **kwargs).arguments
+            if 'parallel_threshold' not in arguments and 'parallel_threshold' not in get_service_data():
+                return cls(*args, parallel_threshold=0, **kwargs)
+            return cls(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, load)
+
+    def __phase(self, name: str, **info) -> ContextManager[Optional[LoadPhase]]:
+        return self.load_report.phase(name, **info) if self.load_report else contextlib.nullcontext()
+
+    def __make_cache(self, cache_path: str | Path, files: List[Path]) -> ConfigCache:
+        return ConfigCache(
+            cache_path,
+            *self.__cache_sources,
+            *files,
+            salt=self.__salt(),
+        )
+
+    def __salt(self) -> str:
+        """ Part of the cache and snapshot keys: the same files give other blocks in another mode or environment. """
+        salt = f"developer_mode={bool(self.developer_mode)}"
+        if self.overrides:
+            salt += f";overrides={json.dumps(self.overrides, sort_keys=True)}"
+        return salt
+
+    def __config_files(self) -> List[Path]:
+        return config_files(self.config_path)
 
     def __load(self, *models: BlockCore, files: List[str | Path]) -> Type[dataclasses.dataclass]:
-        merger = YamlFileMerger(*files)
+        if self.daemon_socket:
+            with self.__phase('daemon_connect', socket=str(self.daemon_socket)):
+                self.daemon = DaemonClient.connect(
+                    self.daemon_socket,
+                    developer_mode=self.developer_mode,
+                    configs_path=self.config_path.resolve(),
+                    overrides=self.overrides,
+                    fallback=functools.partial(self.__direct_block, files),
+                )
+            if self.daemon:
+                logger.debug('Configuration served by daemon', socket=self.daemon_socket, version=self.daemon.version)
+                return LazyModels(
+                    [block for block in models if block.__block__],
+                    self.daemon.pending(),
+                    development_mode=self.developer_mode,
+                    wrap=freeze if self.compact else None,
+                )
+
+        snapshot_key = None
+        if self.snapshot_path:
+            with self.__phase('snapshot_attach', path=str(self.snapshot_path)):
+                snapshot_key = fingerprint(*self.__cache_sources, *files, salt=self.__salt())
+                snapshot = SharedSnapshot.attach(self.snapshot_path, key=snapshot_key)
+            if snapshot:
+                logger.debug('Configuration attached to snapshot', path=snapshot.path)
+                return LazyModels(
+                    [block for block in models if block.__block__],
+                    snapshot.pending(),
+                    development_mode=self.developer_mode,
+                    wrap=freeze if self.compact else None,
+                )
+
+        with self.__phase('cache_load') if self.cache else contextlib.nullcontext():
+            blocks = self.cache.load() if self.cache else None
+        if blocks is None and self.lazy and not self.snapshot_path:
+            return LazyModels(
+                [block for block in models if block.__block__],
+                apply_overrides(self.__merge(files).data, self.overrides),
+                development_mode=self.developer_mode,
+                wrap=freeze if self.compact else None,
+            )
+        elif blocks is None:
+            blocks = self.__convert(*models, files=files)
+            if self.cache:
+                with self.__phase('cache_dump'):
+                    self.cache.dump(blocks)
+        else:
+            logger.debug('Configuration loaded from cache', path=self.cache.cache_file)
+
+        if self.snapshot_path:
+            with self.__phase('snapshot_publish', path=str(self.snapshot_path)):
+                SharedSnapshot.publish(self.snapshot_path, snapshot_key, blocks)
+
+        self.__blocks = dict(blocks)
+        with self.__phase('models', compact=bool(self.compact)):
+            return self.__make_models(blocks)
+
+    def __make_models(self, blocks: Iterable[Tuple[str, BlockCore]]) -> Type[dataclasses.dataclass]:
+        if self.compact:
+            return freeze_models(blocks)
+
+        return dataclasses.make_dataclass('Data', [
+            (block_name, type(value), dataclasses.field(default=value))
+            for block_name, value in blocks
+        ])
+
+    def __merge(self, files: List[str | Path]) -> YamlFileMerger:
+        with self.__phase('read', files=len(files)) as phase:
+            merger = YamlFileMerger(
+                *files,
+                backend=self.yaml_backend,
+                parallel_threshold=self.parallel_threshold,
+                keep_documents=self.__keep_documents,
+                report=phase,
+            )
+        self.__layers = merger.layers
+        return merger
+
+    def __make_index(self, models: Any) -> ConfigIndex:
+        if isinstance(models, LazyModels):
+            return ConfigIndex(
+                [block.__block__ for block in self.__model_classes if block.__block__],
+                loader=lambda block_name: getattr(models, block_name, None),
+            )
+        if self.compact:
+            # The frozen blocks of `models`, so that `get` returns the same immutable objects
+            return ConfigIndex.build((block_name, getattr(models, block_name)) for block_name in self.__blocks)
+        return ConfigIndex.build(self.__blocks.items())
+
+    def get(self, path: str, default: Any = None) -> Any:
+        """
+        Value at a dotted path, e.g. `config.get("postgresql.port")`; the same value as in `models`.
+        Returns `default` if the path is not configured.
+        """
+        return self.index.get(path, default)
+
+    def items(self, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+        """ `(path, value)` pairs under a dotted `prefix` (everything if empty), sorted by path. """
+        return self.index.items(prefix)
+
+    def __direct_block(self, files: List[str | Path], block_name: str) -> Optional[BlockCore]:
+        """ Fallback of the daemon client: converts one block from the configuration files. """
+        if self.__direct_data is None:
+            self.__direct_data = apply_overrides(self.__merge(files).data, self.overrides)
+
+        block = next(block for block in self.__model_classes if block.__block__ == block_name)
+        return block.from_dict(self.__direct_data.get(block_name), development_mode=self.developer_mode)
+
+    def __convert(self, *models: BlockCore, files: List[str | Path]) -> List[Tuple[str, BlockCore]]:
+        data = apply_overrides(self.__merge(files).data, self.overrides)
+
+        blocks = []
+        with self.__phase('convert') as phase:
+            for block in models:
+                if phase is None or not block.__block__:
+                    value = block.from_dict(data.get(block.__block__), development_mode=self.developer_mode)
+                else:
+                    with phase.phase('block', block=block.__block__):
+                        value = block.from_dict(data.get(block.__block__), development_mode=self.developer_mode)
+
+                if not value:
+                    continue
+
+                blocks.append((block.__block__, value))
+
+        return blocks
+
+    def blocks(self) -> Dict[str, BlockCore]:
+        """ Converted blocks by name; a lazily loaded configuration is converted completely first. """
+        if isinstance(self.models, LazyModels):
+            self.models.validate()
+            return {block_name: getattr(self.models, block_name) for block_name in self.models.loaded}
+        return dict(self.__blocks)
+
+    def subscribe(self, callback: Callable[[Type[dataclasses.dataclass], ConfigChange], None]) -> None:
+        """ Registers `callback(models, change)` to be called after every successful reload. """
+        self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Type[dataclasses.dataclass], ConfigChange], None]) -> None:
+        self.__subscribers.remove(callback)
+
+    def reload(self, changed: Optional[Iterable[str | Path]] = None) -> Optional[ConfigChange]:
+        """
+        Re-parses the changed configuration files (all of them if `changed` is None), rebuilds the blocks whose
+        values changed and publishes a new `models` object. A file that cannot be read or parsed keeps its previous
+        content. Returns the applied change, or None if no value changed.
+        """
+        with self.__reload_lock:
+            files = self.__config_files()
+            layers = self.__layers if self.__layers is not None else LayeredMerge()
+            known = set(files) | set(layers.documents)
+            changed_files = sorted(known if changed is None else known & {Path(path) for path in changed})
+            to_parse = [file for file in files if file in changed_files or file not in layers.documents]
+            if not changed_files:
+                return None
+
+            merger = YamlFileMerger(
+                *to_parse,
+                backend=self.yaml_backend,
+                parallel_threshold=self.parallel_threshold,
+                keep_documents=True,
+            )
+
+            # Without the documents of the last load the merged values cannot be compared before conversion
+            baseline = layers is self.__layers
+            lazy_models = self.models if isinstance(self.models, LazyModels) else None
+            if lazy_models and baseline:
+                # Pending blocks still point into `layers.data`, which is about to be updated in place
+                lazy_models.detach(
+                    key
+                    for document in [*(layers.documents.get(file) for file in changed_files), *merger.documents.values()]
+                    if isinstance(document, dict)
+                    for key in document
+                )
+
+            failed = {
+                file: err for file, err in merger.errors.items()
+                # A file that disappeared is removed from the configuration, anything else keeps its last good content
+                if not (isinstance(err, FileNotFoundError) and not file.exists())
+            }
+            for file, err in failed.items():
+                logger.error('Configuration file cannot be read, keeping its previous content', file=str(file), err=str(err))
+
+            # Top-level values that the changed files can affect, copied before `layers.data` is updated in place
+            candidates = {
+                key
+                for document in [*(layers.documents.get(file) for file in changed_files), *merger.documents.values()]
+                if isinstance(document, dict)
+                for key in document
+            }
+            previous = dict(layers.data)
+            previous.update({key: copy.deepcopy(layers.data[key]) for key in candidates if key in layers.data})
+
+            try:
+                touched_paths = set()
+                for file in sorted(set(changed_files) | set(to_parse)):
+                    if file in failed:
+                        continue
+                    if file in merger.documents:
+                        touched_paths |= layers.set(file, merger.documents[file])
+                    else:
+                        touched_paths |= layers.remove(file)
+                touched_paths |= layers.reorder(file for file in files if file not in failed or file in layers.documents)
+
+                # Only blocks whose merged values differ are rebuilt and reported
+                touched = {
+                    key for key in {path[0] for path in touched_paths}
+                    if previous.get(key, _MISSING) != layers.data.get(key, _MISSING)
+                }
+                # `layers.data` is updated in place by later reloads, the overrides go into a new tree
+                merged_data = apply_overrides(layers.data, self.overrides)
+
+                blocks = dict(self.__blocks)
+                rebuilt = []
+                for block in self.__model_classes:
+                    if not block.__block__ or block.__block__ not in touched:
+                        continue
+
+                    if lazy_models:
+                        rebuilt.append(block.__block__)
+                        continue
+
+                    value = block.from_dict(merged_data.get(block.__block__), development_mode=self.developer_mode)
+                    if not baseline and _flat(value) == _flat(self.__blocks.get(block.__block__)):
+                        continue
+
+                    rebuilt.append(block.__block__)
+                    if value:
+                        blocks[block.__block__] = value
+                    else:
+                        blocks.pop(block.__block__, None)
+            except Exception:
+                # `layers` may be half-updated, the next reload starts from scratch
+                self.__layers = None
+                raise
+
+            self.__layers = layers
+            if not rebuilt:
+                logger.info('Configuration files changed, values unchanged', files=[str(file) for file in changed_files])
+                return None
+
+            if lazy_models:
+                models = lazy_models.replace({block_name: merged_data.get(block_name) for block_name in rebuilt})
+                self.models = models
+                self.index = self.__make_index(models)
+            else:
+                ordered_blocks = [
+                    (block.__block__, blocks[block.__block__])
+                    for block in self.__model_classes
+                    if block.__block__ in blocks
+                ]
+
+                self.__blocks = dict(ordered_blocks)
+                models = self.__make_models(ordered_blocks)
+                self.models = models
+                self.index = self.__make_index(models)
+
+                if self.cache:
+                    self.cache = self.__make_cache(self.cache.cache_file.parent, files)
+                    self.cache.dump(ordered_blocks)
+
+            change = ConfigChange(files=changed_files, blocks=rebuilt)
+            logger.info('Configuration reloaded', files=[str(file) for file in changed_files], blocks=rebuilt)
+
+        self.__notify(models, change)
+        return change
+
+    def __notify(self, models: Type[dataclasses.dataclass], change: ConfigChange) -> None:
+        for callback in list(self.__subscribers):
+            try:
+                callback(models, change)
+            except Exception as err:
+                logger.error('Configuration subscriber failed', callback=callback, err=err, exc_info=True)
+
+    def __daemon_changed(self, blocks: List[str]) -> None:
+        with self.__reload_lock:
+            daemon = self.daemon
+            if daemon is None or not isinstance(self.models, LazyModels):
+                return
+
+            models = self.models.replace({block_name: DaemonBlock(daemon, block_name) for block_name in blocks})
+            self.models = models
+            self.index = self.__make_index(models)
+            change = ConfigChange(blocks=list(blocks))
+            logger.info('Configuration reloaded from daemon', blocks=change.blocks)
 
-        __fields_from_dataclass = []
-        for block in models:
-            value = block.from_dict(merger.data.get(block.__block__), development_mode=self.developer_mode)
+        self.__notify(models, change)
 
-            if not value:
-                continue
+    def __daemon_lost(self) -> None:
+        """ The daemon stopped pushing changes: watch the files directly and catch up with them. """
+        if self.daemon is None or self.watcher is not None:
+            return
 
-            __fields_from_dataclass.append((block.__block__, type(block), dataclasses.field(default=value)))
+        self.watcher = ConfigWatcher(self.config_path, self.reload, debounce=self.__watch_debounce).start()
+        self.reload()
 
-        return dataclasses.make_dataclass('Data', __fields_from_dataclass)
+    def close(self) -> None:
+        """ Stops watching the configuration folder and disconnects from the daemon. """
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        if self.daemon:
+            daemon, self.daemon = self.daemon, None
+            daemon.close()
 
 
 if __name__ == '__main__':
@@ -21,14 +21,24 @@ debug its operation.
 setup_logger.py developed by morington
 https://gist.github.com/morington/906cbc6fca128bde4ab81fb8e8eed849
 """
+import atexit
+import copy
+import gzip
 import os
+import queue
+import random
+import shutil
 import sys
+import threading
+import time
 import logging
 import logging.config
+import logging.handlers
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Dict, Tuple
 
 import structlog
 from structlog.typing import EventDict
@@ -41,6 +51,13 @@ CONSOLE_FORMATTER: str = "console_formatter"
 JSONFORMAT_HANDLER: str = "jsonformat"
 JSONFORMAT_FORMATTER: str = "jsonformat_formatter"
 
+""" Profiles: `default` renders and writes in the calling thread, `production` hands records to a background thread """
+DEFAULT_PROFILE: str = "default"
+PRODUCTION_PROFILE: str = "production"
+
+_listeners: List[logging.handlers.QueueListener] = []
+_limiters: List["EventLimiter"] = []
+
 
 def logger_detailed(logger: logging.Logger, method_name: str, event_dict: EventDict) -> EventDict:
     """
@@ -52,6 +69,10 @@ def logger_detailed(logger: logging.Logger, method_name: str, event_dict: EventD
     Returns:
     EventDict: Augmented event dictionary.
     """
+    if "filename" not in event_dict:
+        # Callsite capture is disabled for this logger
+        return event_dict
+
     filename: str = event_dict.pop("filename")
     func_name: str = event_dict.pop("func_name")
     lineno: str = event_dict.pop("lineno")
@@ -70,6 +91,13 @@ class LoggerReg:
     level (Level): Logging level.
     propagate (bool): Flag to indicate whether messages should be passed to parent loggers. Default is False.
     write_file (bool): Flag to indicate whether logs should be written to a file. Default is True.
+    callsite (bool): Flag to add `file:function:line` of the call to every event. Inspecting the caller's frame
+        has a cost on every log call; disable it for hot loggers. Default is True.
+    sample_rate (float): Fraction of the events that is kept, e.g. 0.1 for one in ten. Default is 1.0 (all).
+    rate_limit (Optional[int]): Maximum number of identical events (same level and message) per `rate_period`.
+        Default is None, no limit.
+    rate_period (float): Window of `rate_limit` in seconds, also the interval of "events suppressed" summaries.
+        Default is 1.0.
     """
     class Level(Enum):
         DEBUG: str = "DEBUG"
@@ -83,6 +111,297 @@ class LoggerReg:
     level: Level = Level.DEBUG
     propagate: bool = False
     write_file: bool = False
+    callsite: bool = True
+    sample_rate: float = 1.0
+    rate_limit: Optional[int] = None
+    rate_period: float = 1.0
+
+
+def find_registration(registrations: Dict[str, LoggerReg], name: Optional[str]) -> Optional[LoggerReg]:
+    """ Registration of the logger `name`: the one with the longest matching name, as the logging hierarchy does. """
+    parts = (name or "").split(".")
+    for size in range(len(parts), 0, -1):
+        registration = registrations.get(".".join(parts[:size]))
+        if registration is not None:
+            return registration
+    return registrations.get("")
+
+
+class CallsiteAdder:
+    """
+    `CallsiteParameterAdder` applied only to the loggers whose `LoggerReg` has `callsite=True`.
+    """
+
+    def __init__(self, name_registration: List[LoggerReg]) -> None:
+        self.registrations: Dict[str, LoggerReg] = {reg.name: reg for reg in name_registration}
+        self.cache: Dict[Optional[str], bool] = {}
+        self.adder = structlog.processors.CallsiteParameterAdder(
+            {
+                structlog.processors.CallsiteParameter.FILENAME,
+                structlog.processors.CallsiteParameter.FUNC_NAME,
+                structlog.processors.CallsiteParameter.LINENO,
+            },
+            # The caller's frame is looked up from here, skip this module as well
+            additional_ignores=[__name__],
+        )
+
+    def enabled(self, name: Optional[str]) -> bool:
+        enabled = self.cache.get(name)
+        if enabled is None:
+            registration = find_registration(self.registrations, name)
+            enabled = self.cache[name] = registration is None or registration.callsite
+        return enabled
+
+    def __call__(self, logger: logging.Logger, method_name: str, event_dict: EventDict) -> EventDict:
+        name = getattr(logger, "name", None)
+        if name is None and "_record" in event_dict:
+            name = event_dict["_record"].name
+        if self.enabled(name):
+            return self.adder(logger, method_name, event_dict)
+        return event_dict
+
+
+class EventLimiter:
+    """
+    Drops events of loggers registered with `sample_rate` or `rate_limit` before the rest of the chain runs.
+
+    Events are counted per logger, level and message in windows of `rate_period` seconds. Windows that ended
+    with dropped occurrences are reported as an "Events suppressed" warning with their number: on the next
+    limited event, or by a background timer while nothing else is logged. Counts still pending are reported
+    by `report()` (at exit and on reconfiguration). Windows are kept in the order they started; at most `MAX_KEYS`
+    are tracked, beyond that the oldest one is reported and dropped.
+    """
+    SUMMARY_EVENT: str = "Events suppressed"
+    MAX_KEYS: int = 10000
+
+    def __init__(self, name_registration: List[LoggerReg], clock: Callable[[], float] = time.monotonic) -> None:
+        self.registrations: Dict[str, LoggerReg] = {reg.name: reg for reg in name_registration}
+        limited = [reg for reg in name_registration if reg.sample_rate < 1 or reg.rate_limit is not None]
+        self.active = bool(limited)
+        self.sweep_interval = min((reg.rate_period for reg in limited), default=1.0)
+        self.clock = clock
+        self.cache: Dict[Optional[str], Optional[LoggerReg]] = {}
+        # (logger, level, event) -> [window start, kept, suppressed, period], oldest window first
+        self.windows: OrderedDict[Tuple[str, str, str], List[float]] = OrderedDict()
+        self.next_sweep = 0.0
+        self.timer: Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def limits(self, name: Optional[str]) -> Optional[LoggerReg]:
+        if name not in self.cache:
+            registration = find_registration(self.registrations, name)
+            limited = registration is not None and (registration.sample_rate < 1 or registration.rate_limit is not None)
+            self.cache[name] = registration if limited else None
+        return self.cache[name]
+
+    def summary(self, key: Tuple[str, str, str], suppressed: int, period: float) -> None:
+        name, method_name, event = key
+        self.local.reporting = True
+        try:
+            structlog.get_logger(name).warning(
+                self.SUMMARY_EVENT, suppressed=suppressed, suppressed_event=event, suppressed_level=method_name, seconds=period,
+            )
+        finally:
+            self.local.reporting = False
+
+    def sweep(self, now: float) -> List[Tuple[Tuple[str, str, str], int, float]]:
+        """
+        Removes the windows that ended and returns their suppressed counts; called with the lock held.
+        Stops at the oldest window still running, a shorter one behind it is reported by the next sweep after it.
+        """
+        summaries = []
+        while self.windows:
+            key, window = next(iter(self.windows.items()))
+            if now - window[0] < window[3]:
+                break
+            if window[2]:
+                summaries.append((key, int(window[2]), window[3]))
+            del self.windows[key]
+        self.next_sweep = now + self.sweep_interval
+        return summaries
+
+    def run_timer(self) -> None:
+        while not self.stopped.wait(self.sweep_interval):
+            with self.lock:
+                summaries = self.sweep(self.clock())
+                idle = not self.windows
+                if idle:
+                    self.timer = None
+            for summary in summaries:
+                self.summary(*summary)
+            if idle:
+                return
+
+    def report(self) -> None:
+        """ Logs the suppressed counts not reported yet and stops the timer. """
+        self.stopped.set()
+        with self.lock:
+            pending = [(key, int(window[2]), window[3]) for key, window in self.windows.items() if window[2]]
+            self.windows.clear()
+        for summary in pending:
+            self.summary(*summary)
+
+    def __call__(self, logger: logging.Logger, method_name: str, event_dict: EventDict) -> EventDict:
+        name = getattr(logger, "name", None)
+        registration = self.limits(name)
+        if registration is None or getattr(self.local, "reporting", False):
+            return event_dict
+
+        key = (name, method_name, str(event_dict.get("event")))
+        now = self.clock()
+        with self.lock:
+            summaries = self.sweep(now) if now >= self.next_sweep else []
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= window[3]:
+                if window is not None:
+                    del self.windows[key]
+                    if window[2]:
+                        summaries.append((key, int(window[2]), window[3]))
+                elif len(self.windows) >= self.MAX_KEYS:
+                    oldest_key, oldest = self.windows.popitem(last=False)
+                    if oldest[2]:
+                        summaries.append((oldest_key, int(oldest[2]), now - oldest[0]))
+                window = self.windows[key] = [now, 0, 0, registration.rate_period]
+
+            keep = (
+                (registration.rate_limit is None or window[1] < registration.rate_limit)
+                and (registration.sample_rate >= 1 or random.random() < registration.sample_rate)
+            )
+            window[1 if keep else 2] += 1
+
+            if not keep and self.timer is None and not self.stopped.is_set():
+                # Reports the windows that end after the flood stopped, when nothing else is logged
+                self.timer = threading.Thread(target=self.run_timer, name="confhub-log-limiter", daemon=True)
+                self.timer.start()
+
+        for summary in summaries:
+            self.summary(*summary)
+        if not keep:
+            raise structlog.DropEvent
+        return event_dict
+
+
+class StructlogQueueHandler(logging.handlers.QueueHandler):
+    """
+    `QueueHandler` that enqueues records as they are: the structlog event dict stays in `record.msg` and is
+    rendered by the `ProcessorFormatter` of the target handlers on the listener thread.
+    Exceptions are already formatted into the event by the pre-chain.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+def gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def gzip_rotator(source: str, dest: str) -> None:
+    """ Compresses a rotated log segment. """
+    with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+        shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    File handler that collects formatted records in memory and writes them in batches, when `buffer_size`
+    characters are pending or every `flush_interval` seconds. The file is rotated by size before a batch
+    would make it exceed `max_bytes`, keeping `backup_count` segments (gzip-compressed with `compress`).
+    Attributes:
+    filename (str): Path of the log file.
+    max_bytes (int): Size at which the file is rotated; 0 disables rotation. Default is 10 MiB.
+    backup_count (int): Number of rotated segments to keep. Default is 5.
+    compress (bool): Flag to gzip rotated segments (`<file>.1.gz`). Default is False.
+    buffer_size (int): Pending characters that trigger a write. Default is 64 KiB.
+    flush_interval (float): Seconds between background writes of pending records; 0 disables them. Default is 1.0.
+    """
+
+    def __init__(
+            self,
+            filename: str,
+            max_bytes: int = 10 * 1024 * 1024,
+            backup_count: int = 5,
+            compress: bool = False,
+            buffer_size: int = 64 * 1024,
+            flush_interval: float = 1.0,
+            encoding: str = "utf-8",
+    ) -> None:
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        if compress:
+            self.namer = gzip_namer
+            self.rotator = gzip_rotator
+
+        self.buffer: List[str] = []
+        self.buffered = 0
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="confhub-log-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record) + self.terminator
+        except Exception:
+            self.handleError(record)
+            return
+
+        self.buffer.append(line)
+        self.buffered += len(line)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ Writes the pending records, rotating the file first if they would not fit. """
+        with self.lock:
+            if not self.buffer:
+                return
+            data = "".join(self.buffer)
+            self.buffer.clear()
+            self.buffered = 0
+
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                if self.maxBytes > 0 and self.stream.tell() and self.stream.tell() + len(data) > self.maxBytes:
+                    self.doRollover()
+                    self.stream = self._open()
+                self.stream.write(data)
+                self.stream.flush()
+            except Exception:
+                self.handleError(logging.makeLogRecord({"msg": "Cannot write %d buffered characters", "args": (len(data),)}))
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+        super().close()
+
+
+def stop_listeners() -> None:
+    """ Flushes and stops the background logging threads of the production profile. """
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def report_suppressed() -> None:
+    """ Logs the "Events suppressed" summaries still pending in the configured `EventLimiter`. """
+    if _limiters:
+        _limiters.pop().report()
+
+
+# Registered after `stop_listeners`, so the summaries are logged before the queues are drained
+atexit.register(stop_listeners)
+atexit.register(report_suppressed)
 
 
 class SetupLogger:
@@ -94,6 +413,11 @@ class SetupLogger:
     default_development (bool): Flag to indicate the development mode, forces the output format to be CONSOLE. Default is False.
     log_to_file (bool): Flag to indicate that logs are written to a file. Default is False.
     logs_dir (str): Directory for writing logs. Default is "logs".
+    file_write_format (str): Formatter of the log file. Default is JSON.
+    file_options (Optional[Dict[str, Any]]): Arguments of `BufferedRotatingFileHandler` (`max_bytes`, `backup_count`,
+        `compress`, `buffer_size`, `flush_interval`). Default is None, the handler defaults.
+    profile (str): `default` or `production`. In the production profile the loggers only put records on a queue;
+        a `QueueListener` thread renders and writes them. Default is `default`.
 
     Methods:
     __str__(): Returns a string representation of the class.
@@ -111,7 +435,9 @@ class SetupLogger:
             developer_mode: bool = False,
             log_to_file: bool = False,
             logs_dir: str = "logs",
-            file_write_format: str = JSONFORMAT_FORMATTER
+            file_write_format: str = JSONFORMAT_FORMATTER,
+            file_options: Optional[Dict[str, Any]] = None,
+            profile: str = DEFAULT_PROFILE,
     ) -> None:
         self.name_registration = [LoggerReg(name="", level=LoggerReg.Level.DEBUG)] if name_registration is None else name_registration
         self.name_registration.extend([LoggerReg(name="confhub", level=LoggerReg.Level.INFO)])
@@ -119,7 +445,12 @@ class SetupLogger:
         self.log_to_file = log_to_file
         self.logs_dir = logs_dir
         self.file_write_format = file_write_format
+        self.file_options = file_options or {}
+        if profile not in (DEFAULT_PROFILE, PRODUCTION_PROFILE):
+            raise ValueError(f"Unknown logging profile: {profile}")
+        self.profile = profile
         self.module_name = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+        self.limiter = EventLimiter(self.name_registration)
         self.init_structlog()
 
     def __str__(self) -> str:
@@ -162,20 +493,17 @@ class SetupLogger:
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
             structlog.processors.StackInfoRenderer(),
-            structlog.processors.CallsiteParameterAdder(
-                {
-                    structlog.processors.CallsiteParameter.FILENAME,
-                    structlog.processors.CallsiteParameter.FUNC_NAME,
-                    structlog.processors.CallsiteParameter.LINENO,
-                }
-            ),
+            CallsiteAdder(self.name_registration),
             logger_detailed,
         ]
         if addit:
+            # Events below the level are dropped first; sampled and rate-limited ones before any other work
+            limiter = [self.limiter] if self.limiter.active else []
             preprocessors: List[any] = (
                     [
-                        structlog.contextvars.merge_contextvars,
                         structlog.stdlib.filter_by_level,
+                        *limiter,
+                        structlog.contextvars.merge_contextvars,
                     ]
                     + preprocessors
                     + [
@@ -185,8 +513,31 @@ class SetupLogger:
             )
         return preprocessors
 
+    def init_queues(self) -> None:
+        """ Production profile: replaces the handlers of every registered logger by a queue served by a listener thread. """
+        queues: Dict[Tuple[logging.Handler, ...], StructlogQueueHandler] = {}
+        for logger_setting in self.name_registration:
+            logger = logging.getLogger(logger_setting.name)
+            handlers = tuple(logger.handlers)
+            if not handlers:
+                continue
+
+            queue_handler = queues.get(handlers)
+            if queue_handler is None:
+                records: queue.SimpleQueue = queue.SimpleQueue()
+                queue_handler = queues[handlers] = StructlogQueueHandler(records)
+                listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+                listener.start()
+                _listeners.append(listener)
+
+            logger.handlers = [queue_handler]
+
     def init_structlog(self):
         """ Initializes logging settings using structlog. """
+        # Records still queued for the previous configuration are written out first
+        report_suppressed()
+        stop_listeners()
+
         handlers = {
             CONSOLE_HANDLER: {
                 "class": "logging.StreamHandler",
@@ -204,9 +555,10 @@ class SetupLogger:
             log_filename = f"{module_logs_dir}/{datetime.now().strftime('%d.%m.%Y_%H_%M_%S')}.log"
 
             file_handler = {
-                "class": "logging.FileHandler",
+                "()": BufferedRotatingFileHandler,
                 "filename": log_filename,
                 "formatter": self.file_write_format,
+                **self.file_options,
             }
             handlers['file_handler'] = file_handler
 
@@ -238,8 +590,13 @@ class SetupLogger:
             }
         )
 
+        if self.profile == PRODUCTION_PROFILE:
+            self.init_queues()
+
         structlog.configure(
             processors=self.preprocessors(True),
             logger_factory=structlog.stdlib.LoggerFactory(),
             cache_logger_on_first_use=True,
         )
+        if self.limiter.active:
+            _limiters.append(self.limiter)
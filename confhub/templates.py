@@ -16,7 +16,8 @@ class PostgreSQL(BlockCore):
     Creating values is very simple:
         value_name = field(data_type, development_mode=True/False, secret=True/False, filename='MY_FILE')
         
-        data_type - data value type in the configuration, supported types: `str`, `int`, `float`, `bool`
+        data_type - data value type in the configuration, supported types: `str`, `int`, `float`, `bool`,
+            `Decimal`, `datetime`, `date`, `timedelta`, `ByteSize` and types registered with `confhub.core.types.register_type`
         secret - means whether to hide this field as secrets (default is False, all files go to settings by default)
         filename - you can independently define the field in the file that is required, Confhub will create it for you.
             If a file starts with a dot, it automatically goes into .gitignore.
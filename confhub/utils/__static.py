@@ -0,0 +1,305 @@
+import ast
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import structlog
+
+from confhub.core.block import BlockCore
+from confhub.core.fields import ConfigurationField, exclude as exclude_block
+from confhub.core.types import TYPES
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+INDEX_VERSION = 2
+INDEX_FILENAME = "confhub_models.json"
+
+_indexes: Dict[str, Dict[str, Any]] = {}
+
+
+class StaticModelVisitor:
+    """
+    Reads `BlockCore` subclasses and their `field(...)` declarations from the AST of a models module.
+
+    Anything that cannot be understood without running the module (computed arguments, unknown data types,
+    star imports, names imported from outside the standard library, ...) marks the index as incomplete, so callers
+    can fall back to importing the module.
+    """
+
+    def __init__(self, tree: ast.Module) -> None:
+        self.tree = tree
+        self.block_bases: Set[str] = set()
+        self.field_names: Set[str] = set()
+        self.exclude_names: Set[str] = set()
+        self.confhub_modules: Set[str] = set()
+        self.names: Set[str] = set()
+        self.star_import = False
+        self.foreign: Set[str] = set()
+        self.models: List[Dict[str, Any]] = []
+        self.problems: List[str] = []
+
+    def visit(self) -> Dict[str, Any]:
+        self.collect_names(self.tree.body)
+        for node in self.tree.body:
+            if isinstance(node, ast.ImportFrom):
+                self.visit_import_from(node)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.name == 'confhub' or alias.name.startswith('confhub.'):
+                        self.confhub_modules.add(alias.asname or alias.name)
+                    else:
+                        self.foreign.add((alias.asname or alias.name).split('.')[0])
+            elif isinstance(node, ast.ClassDef):
+                self.visit_class(node)
+
+        return {
+            'version': INDEX_VERSION,
+            'complete': not self.problems,
+            'problems': self.problems,
+            'names': None if self.star_import else sorted(self.names),
+            'models': self.models,
+        }
+
+    def visit_import_from(self, node: ast.ImportFrom) -> None:
+        module = node.module or ''
+        for alias in node.names:
+            name = alias.asname or alias.name
+            if alias.name == '*':
+                self.star_import = True
+                self.problems.append(f"line {node.lineno}: star import from `{module}`")
+            elif module == 'confhub' or module.startswith('confhub.'):
+                if alias.name == 'BlockCore':
+                    self.block_bases.add(name)
+                elif alias.name == 'field':
+                    self.field_names.add(name)
+                elif alias.name == 'exclude':
+                    self.exclude_names.add(name)
+            else:
+                self.foreign.add(name)
+                if node.level or module.split('.')[0] not in sys.stdlib_module_names:
+                    # An imported `BlockCore` subclass is a model of this module as well
+                    self.problems.append(f"line {node.lineno}: `{name}` imported from `{module or '.'}` may be a model")
+
+    def collect_names(self, body: List[ast.stmt]) -> None:
+        """ Module-level names a model class can be bound to, including conditional definitions and imports. """
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                self.names.add(node.name)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.names.update((alias.asname or alias.name).split('.')[0] for alias in node.names if alias.name != '*')
+            elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    self.names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+            elif isinstance(node, (ast.If, ast.Try, ast.With, ast.For, ast.While)):
+                for field_name in ('body', 'orelse', 'finalbody'):
+                    self.collect_names(getattr(node, field_name, []))
+                for handler in getattr(node, 'handlers', []):
+                    self.collect_names(handler.body)
+
+    def is_confhub_attribute(self, node: ast.expr, attribute: str) -> bool:
+        return (
+            isinstance(node, ast.Attribute)
+            and node.attr == attribute
+            and ast.unparse(node.value) in self.confhub_modules
+        )
+
+    def is_block_base(self, node: ast.expr) -> bool:
+        if isinstance(node, ast.Name):
+            return node.id in self.block_bases
+        return self.is_confhub_attribute(node, 'BlockCore')
+
+    def visit_class(self, node: ast.ClassDef) -> None:
+        if not any(self.is_block_base(base) for base in node.bases):
+            # A base imported from another module may itself be a `BlockCore` subclass
+            for base in node.bases:
+                root = base
+                while isinstance(root, ast.Attribute):
+                    root = root.value
+                if isinstance(root, ast.Name) and root.id in self.foreign:
+                    self.problems.append(f"{node.name}: base `{ast.unparse(base)}` cannot be resolved statically")
+            return
+        self.block_bases.add(node.name)
+
+        model: Dict[str, Any] = {'name': node.name, 'block': None, 'exclude': False, 'attrs': []}
+        for decorator in node.decorator_list:
+            if (isinstance(decorator, ast.Name) and decorator.id in self.exclude_names) or \
+                    self.is_confhub_attribute(decorator, 'exclude'):
+                model['exclude'] = True
+            else:
+                self.problems.append(f"{node.name}: unknown decorator `{ast.unparse(decorator)}`")
+
+        for statement in node.body:
+            if isinstance(statement, ast.Assign) and len(statement.targets) == 1 and isinstance(statement.targets[0], ast.Name):
+                self.visit_attribute(model, statement.targets[0].id, statement.value)
+            elif isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name) and statement.value:
+                self.visit_attribute(model, statement.target.id, statement.value)
+            elif isinstance(statement, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+                self.problems.append(f"{node.name}: unsupported assignment `{ast.unparse(statement)}`")
+
+        self.models.append(model)
+
+    def visit_attribute(self, model: Dict[str, Any], name: str, value: ast.expr) -> None:
+        where = f"{model['name']}.{name}"
+        if name == '__block__':
+            try:
+                model['block'] = ast.literal_eval(value)
+            except ValueError:
+                self.problems.append(f"{where}: `__block__` is not a literal")
+        elif name == '__exclude__':
+            try:
+                model['exclude'] = bool(ast.literal_eval(value))
+            except ValueError:
+                self.problems.append(f"{where}: `__exclude__` is not a literal")
+        elif isinstance(value, ast.Call) and self.is_field_call(value.func):
+            declaration = self.visit_field(where, value)
+            if declaration is not None:
+                model['attrs'].append({'name': name, 'kind': 'field', **declaration})
+        elif self.is_block_instance(value):
+            model['attrs'].append({'name': name, 'kind': 'block', 'class': value.func.id})
+        elif isinstance(value, ast.Call):
+            self.problems.append(f"{where}: `{ast.unparse(value)}` cannot be resolved statically")
+
+    def is_field_call(self, func: ast.expr) -> bool:
+        return (isinstance(func, ast.Name) and func.id in self.field_names) or self.is_confhub_attribute(func, 'field')
+
+    def is_block_instance(self, node: ast.expr) -> bool:
+        return (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in self.block_bases
+            and any(model['name'] == node.func.id for model in self.models)
+            and not node.args
+            and not node.keywords
+        )
+
+    def visit_field(self, where: str, call: ast.Call) -> Optional[Dict[str, Any]]:
+        parameters = ['data_type', 'secret', 'filename', 'is_list', 'packed']
+        arguments: Dict[str, ast.expr] = dict(zip(parameters, call.args))
+        for keyword in call.keywords:
+            if keyword.arg not in parameters:
+                self.problems.append(f"{where}: unknown field argument `{keyword.arg}`")
+                return None
+            arguments[keyword.arg] = keyword.value
+
+        declaration: Dict[str, Any] = {'secret': False, 'filename': None, 'is_list': False, 'packed': False}
+        for parameter in parameters[1:]:
+            if parameter in arguments:
+                try:
+                    declaration[parameter] = ast.literal_eval(arguments[parameter])
+                except ValueError:
+                    self.problems.append(f"{where}: `{parameter}` is not a literal")
+                    return None
+
+        data_type = arguments.get('data_type')
+        if self.is_block_instance(data_type):
+            declaration['block_type'] = data_type.func.id
+        elif isinstance(data_type, (ast.Name, ast.Attribute)):
+            type_name = data_type.id if isinstance(data_type, ast.Name) else data_type.attr
+            if type_name not in TYPES:
+                self.problems.append(f"{where}: data type `{type_name}` is not registered")
+                return None
+            declaration['type'] = type_name
+        else:
+            self.problems.append(f"{where}: data type cannot be resolved statically")
+            return None
+
+        return declaration
+
+
+def discover_models(models_path: str | Path, cache: bool = True) -> Dict[str, Any]:
+    """
+    Returns the static index of the models module at `models_path`, parsing it only when its content changed.
+    The index is cached in memory and in `__pycache__/confhub_models.json` next to the module.
+    """
+    models_path = Path(models_path)
+    source = models_path.read_bytes()
+    digest = hashlib.sha256(source).hexdigest()
+
+    key = str(models_path.resolve())
+    index = _indexes.get(key)
+    if index is not None and index['hash'] == digest:
+        return index
+
+    cache_file = models_path.parent / '__pycache__' / INDEX_FILENAME
+    if cache:
+        try:
+            cached = json.loads(cache_file.read_text(encoding='utf-8')).get(key)
+            if cached and cached['hash'] == digest and cached.get('version') == INDEX_VERSION:
+                _indexes[key] = cached
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    index = StaticModelVisitor(ast.parse(source, filename=str(models_path))).visit()
+    index['hash'] = digest
+    _indexes[key] = index
+
+    if cache:
+        write_index(cache_file, key, index)
+    return index
+
+
+def write_index(cache_file: Path, key: str, index: Dict[str, Any]) -> None:
+    try:
+        try:
+            entries = json.loads(cache_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            entries = {}
+        entries[key] = index
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, prefix=f".{INDEX_FILENAME}.")
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(entries, file)
+        os.replace(tmp_path, cache_file)
+    except OSError as err:
+        logger.debug("Failed to write the static models index", path=cache_file, err=err)
+
+
+def build_models(index: Dict[str, Any]) -> List[type]:
+    """ Creates stand-in `BlockCore` subclasses from a complete index, usable by `ConfigurationBuilder`. """
+    classes: Dict[str, type] = {}
+    for model in index['models']:
+        namespace: Dict[str, Any] = {'__block__': model['block'], '__module__': 'confhub.static_models'}
+        for attr in model['attrs']:
+            if attr['kind'] == 'block':
+                namespace[attr['name']] = classes[attr['class']]()
+            else:
+                data_type = classes[attr['block_type']]() if 'block_type' in attr else TYPES.get(attr['type']).python_type
+                namespace[attr['name']] = ConfigurationField(
+                    data_type=data_type,
+                    secret=attr['secret'],
+                    filename=attr['filename'],
+                    is_list=attr['is_list'],
+                    packed=attr['packed'],
+                )
+
+        block = type(model['name'], (BlockCore,), namespace)
+        classes[model['name']] = exclude_block(block) if model['exclude'] else block
+
+    return list(classes.values())
+
+
+def get_models_static(data: Dict[str, Any], cache: bool = True) -> Optional[List[type]]:
+    """
+    Finds the models of `models_path` without importing the module.
+    Returns None if the module cannot be fully understood statically.
+    With `cache=False` the index is only kept in memory and nothing is written next to the module.
+    """
+    models_path = Path(data.get('models_path'))
+    try:
+        index = discover_models(models_path, cache=cache)
+    except (OSError, SyntaxError) as err:
+        logger.debug("Static model discovery failed", path=models_path, err=err)
+        return None
+
+    if not index['complete']:
+        logger.debug("Models cannot be discovered statically", path=models_path, problems=index['problems'])
+        return None
+
+    return build_models(index)
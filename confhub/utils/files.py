@@ -0,0 +1,70 @@
+import os
+import secrets
+import stat
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+def _umask() -> Optional[int]:
+    """ Current umask where it can be read without setting a new one (Linux), None elsewhere. """
+    try:
+        with open('/proc/self/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _open_temp(path: Path) -> Tuple[int, str]:
+    """ Creates a temporary file next to `path` with mode 0o666, so the kernel applies the umask itself. """
+    while True:
+        tmp_path = str(path.parent / f".{path.name}.{secrets.token_hex(4)}")
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+def owned_by_user(stat_result: os.stat_result) -> bool:
+    """
+    Whether a file that is about to be unpickled can be trusted: owned by the current user (or root)
+    and not writable by the group or others. Always true where uids do not exist.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    return stat_result.st_uid in (os.getuid(), 0) and not stat_result.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def write_text_atomic(path: Path, content: str, existing: Optional[str] = None) -> bool:
+    """
+    Writes `content` to `path` through a temporary file and a rename, so readers never see a half-written file.
+    Nothing is written if the file already has this content (`existing` saves reading it again).
+    Returns whether the file was written.
+    """
+    path = Path(path)
+    if existing is None and path.exists():
+        existing = path.read_text(encoding='utf-8')
+    if existing == content:
+        return False
+
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        # A new file gets the same mode as one created by `open`
+        umask = _umask()
+        mode = 0o666 & ~umask if umask is not None else None
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.") if mode is not None else _open_temp(path)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(content)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
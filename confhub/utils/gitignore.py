@@ -1,25 +1,21 @@
 from pathlib import Path
 
 
-def add_to_gitignore(text: str):
+def add_to_gitignore(*texts: str):
     """
-    Function to add a file to .gitignore if it is not there.
+    Function to add files to .gitignore if they are not there.
+    `.gitignore` is read once and all missing entries are appended in a single write.
     """
     desc = "Added using Confhub"
 
     gitignore_path = Path('.gitignore')
-    if not gitignore_path.exists():
-        with gitignore_path.open('w') as f:
-            f.write(f'\n#{desc}\n{text}\n')
-    else:
+    if gitignore_path.exists():
         with gitignore_path.open('r') as f:
-            lines = f.readlines()
-
-        is_write = True
-        for line in lines:
-            if text in line:
-                is_write = False
+            index = {line.strip() for line in f}
+    else:
+        index = set()
 
-        if is_write:
-            with gitignore_path.open('a') as f:
-                f.write(f'\n#{desc}\n{text}\n')
+    missing = [text for text in dict.fromkeys(texts) if text not in index]
+    if missing:
+        with gitignore_path.open('a') as f:
+            f.write(f'\n#{desc}\n' + ''.join(f'{text}\n' for text in missing))
@@ -0,0 +1,192 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple, List
+
+import structlog
+
+logger: structlog.BoundLogger = structlog.get_logger("confhub")
+
+
+@dataclass(frozen=True)
+class ConfigChange:
+    """
+    Describes a reload published to `Confhub` subscribers.
+    Attributes:
+    files (List[Path]): Configuration files that were added, modified or removed.
+    blocks (List[str]): Names of the blocks that were rebuilt.
+    """
+    files: List[Path] = field(default_factory=list)
+    blocks: List[str] = field(default_factory=list)
+
+
+class PollingBackend:
+    """ Detects changes by comparing size and mtime of the files in the folder. """
+    name = "polling"
+
+    def __init__(self, path: Path, stop_event: threading.Event) -> None:
+        self.path = path
+        self.stop_event = stop_event
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for file_path in self.path.glob('*'):
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[Path]:
+        if self.stop_event.wait(timeout):
+            return set()
+
+        snapshot = self.scan()
+        changed = {
+            file_path
+            for file_path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(file_path) != self.snapshot.get(file_path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyBackend:
+    """ Linux inotify through libc, without third-party dependencies. """
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, path: Path, stop_event: threading.Event) -> None:
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.path = path
+        self.stop_event = stop_event
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = (
+            self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM
+            | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        )
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout: float) -> Set[Path]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(buffer):
+            _, _, _, name_length = self.EVENT_HEADER.unpack_from(buffer, offset)
+            offset += self.EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            if name:
+                changed.add(self.path / os.fsdecode(name))
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ConfigWatcher:
+    """
+    Watches the configuration folder in a background thread and calls `callback` with the changed paths.
+
+    Uses inotify where it is available and mtime polling otherwise. Events are debounced:
+    the callback fires once the folder has been quiet for `debounce` seconds, so a burst of saves
+    results in a single call.
+    """
+
+    def __init__(
+            self,
+            path: str | Path,
+            callback: Callable[[Set[Path]], None],
+            debounce: float = 0.5,
+            poll_interval: float = 1.0,
+            use_inotify: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.backend = None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.path} {self.backend.name if self.backend else 'stopped'}>"
+
+    def start(self) -> 'ConfigWatcher':
+        self._stop_event.clear()
+
+        self.backend = None
+        if self.use_inotify:
+            try:
+                self.backend = InotifyBackend(self.path, self._stop_event)
+            except (OSError, AttributeError) as err:
+                logger.debug("inotify is unavailable, falling back to polling", err=err)
+        if self.backend is None:
+            self.backend = PollingBackend(self.path, self._stop_event)
+
+        self._thread = threading.Thread(target=self._run, name="confhub-watcher", daemon=True)
+        self._thread.start()
+        logger.debug("Watching configuration", path=self.path, backend=self.backend.name)
+        return self
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        pending: Set[Path] = set()
+        try:
+            while not self._stop_event.is_set():
+                changed = self.backend.wait(self.debounce if pending else self.poll_interval)
+                if changed:
+                    pending |= changed
+                elif pending:
+                    try:
+                        self.callback(pending)
+                    except Exception as err:
+                        logger.error("Configuration reload failed", err=err, exc_info=True)
+                    pending = set()
+        finally:
+            self.backend.close()
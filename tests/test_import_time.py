@@ -0,0 +1,11 @@
+from benchmarks.import_time import IMPORT_BUDGET_MS, LAZY_MODULES, measure
+
+
+def test_import_confhub_is_lazy_and_within_budget():
+    timings, modules = [], []
+    for _ in range(3):
+        timing, modules = measure()
+        timings.append(timing)
+
+    assert [module for module in LAZY_MODULES if module in modules] == []
+    assert min(timings) <= IMPORT_BUDGET_MS
@@ -0,0 +1,72 @@
+import copy
+import random
+from pathlib import Path
+
+from confhub.core.parsing import LayeredMerge, merge_dicts
+
+
+def merged(documents, order):
+    data = {}
+    for file in order:
+        merge_dicts(data, copy.deepcopy(documents[file]))
+    return data
+
+
+def random_document(rng, depth=0):
+    document = {}
+    for key in rng.sample("abcd", rng.randint(0, 3)):
+        if depth < 2 and rng.random() < 0.5:
+            document[key] = random_document(rng, depth + 1)
+        else:
+            document[key] = rng.choice([1, 2, "x", None, [1, 2]])
+    return document
+
+
+def test_set_remove_and_reorder_match_merge_dicts():
+    rng = random.Random(5)
+    files = [Path(f"{name}.yml") for name in "pqrst"]
+    for _ in range(200):
+        layers, documents, order = LayeredMerge(), {}, []
+        for _ in range(12):
+            file = rng.choice(files)
+            if order and rng.random() < 0.1:
+                rng.shuffle(order)
+                layers.reorder(order)
+            elif file in documents and rng.random() < 0.3:
+                layers.remove(file)
+                del documents[file]
+                order.remove(file)
+            else:
+                document = random_document(rng)
+                layers.set(file, copy.deepcopy(document))
+                documents[file] = document
+                if file not in order:
+                    order.append(file)
+
+            assert layers.data == merged(documents, order)
+
+
+def test_owner_and_shadowed():
+    layers = LayeredMerge()
+    layers.set("base.yml", {"postgresql": {"host": "localhost", "port": 5432}})
+    layers.set("prod.yml", {"postgresql": {"port": 6432}})
+
+    assert layers.data == {"postgresql": {"host": "localhost", "port": 6432}}
+    assert layers.owner("postgresql.port") == Path("prod.yml")
+    assert layers.owner("postgresql.host") == Path("base.yml")
+    assert layers.shadowed("postgresql.port") == [Path("base.yml")]
+
+    assert layers.remove("prod.yml") == {("postgresql",), ("postgresql", "port")}
+    assert layers.data == {"postgresql": {"host": "localhost", "port": 5432}}
+    assert layers.owner("postgresql.port") == Path("base.yml")
+
+
+def test_scalar_layer_hides_lower_mappings_until_removed():
+    layers = LayeredMerge()
+    layers.set("a.yml", {"cache": {"ttl": 10}})
+    layers.set("b.yml", {"cache": None})
+    layers.set("c.yml", {"cache": {"size": 5}})
+    assert layers.data == {"cache": {"size": 5}}
+
+    layers.remove("b.yml")
+    assert layers.data == {"cache": {"ttl": 10, "size": 5}}
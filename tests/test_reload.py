@@ -0,0 +1,89 @@
+import textwrap
+
+import pytest
+
+from confhub import Confhub
+
+MODELS = '''
+from confhub import BlockCore, field
+
+
+class PostgreSQL(BlockCore):
+    __block__ = 'postgresql'
+    host = field(str)
+    port = field(int)
+
+
+class Cache(BlockCore):
+    __block__ = 'cache'
+    ttl = field(int)
+'''
+
+SETTINGS = '''
+postgresql:
+  host: str; localhost
+  port: int; 5432
+cache:
+  ttl: int; 60
+'''
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "models.py").write_text(MODELS)
+    (tmp_path / "config" / "settings.yml").write_text(SETTINGS)
+    (tmp_path / ".service.yml").write_text(textwrap.dedent('''
+        developer_mode: False
+        models_path: models.py
+        configs_path: config
+    '''))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_reload_rebuilds_only_changed_blocks(project, lazy):
+    config = Confhub(lazy=lazy)
+    cache = config.models.cache
+    settings = project / "config" / "settings.yml"
+
+    settings.write_text(SETTINGS.replace("5432", "6432"))
+    change = config.reload()
+
+    assert change.blocks == ["postgresql"]
+    assert config.models.postgresql.port == 6432
+    assert config.models.cache is cache or lazy
+
+    settings.write_text(SETTINGS.replace("5432", "6432") + "\n# comment\n")
+    assert config.reload() is None
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_reload_keeps_previous_blocks_of_broken_file(project, lazy):
+    config = Confhub(watch=True, lazy=lazy)
+    config.close()
+    settings = project / "config" / "settings.yml"
+
+    settings.write_text(SETTINGS.replace("5432", "6432") + "  broken: [unclosed\n")
+    assert config.reload() is None
+    assert config.models.postgresql.port == 5432
+    assert config.get("cache.ttl") == 60
+
+    settings.write_text(SETTINGS.replace("5432", "6432"))
+    assert config.reload().blocks == ["postgresql"]
+    assert config.models.postgresql.port == 6432
+
+
+def test_reload_removes_blocks_of_deleted_file(project):
+    settings = project / "config" / "settings.yml"
+    settings.write_text(SETTINGS.split("cache:")[0])
+    (project / "config" / "cache.yml").write_text("cache:\n  ttl: int; 30\n")
+    config = Confhub(watch=True)
+    config.close()
+    assert config.models.cache.ttl == 30
+
+    (project / "config" / "cache.yml").unlink()
+    assert config.reload().blocks == ["cache"]
+    assert not hasattr(config.models, "cache")
+    assert config.get("cache.ttl") is None